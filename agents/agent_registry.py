@@ -2,10 +2,11 @@
 Agent registry for managing different types of agents.
 """
 import logging
-from typing import Dict, Type, List
+import threading
+from typing import Dict, Type, List, Optional
 
+from settings import get_settings
 from .base_agent import BaseAgent
-from .codegen_agent import CodegenAgent
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,15 @@ class AgentRegistry:
     Registry for managing agent types and instances.
     """
     _agents: Dict[str, Type[BaseAgent]] = {}
+    _descriptions: Dict[str, str] = {}
+    _help_text: str = ""
+    _instances: Dict[str, BaseAgent] = {}
+    _instances_lock = threading.Lock()
+    _active_agents: Dict[str, str] = {}
+    _active_lock = threading.Lock()
+    _default_agent: Optional[str] = None
+    _defaults_registered = False
+    _defaults_lock = threading.Lock()
     
     @classmethod
     def register_agent(cls, name: str, agent_class: Type[BaseAgent]):
@@ -25,6 +35,11 @@ class AgentRegistry:
             agent_class: The agent class
         """
         cls._agents[name] = agent_class
+        cls._instances.pop(name, None)
+        cls._descriptions[name] = agent_class.get_description()
+        cls._help_text = "*Available Agents:*\n" + "".join(
+            f"• *{agent_name}*: {description}\n" for agent_name, description in cls._descriptions.items()
+        )
         logger.info(f"Registered agent: {name}")
     
     @classmethod
@@ -38,10 +53,64 @@ class AgentRegistry:
         Returns:
             The agent class
         """
+        cls._ensure_default_agents()
         if name not in cls._agents:
             raise ValueError(f"Unknown agent: {name}")
         return cls._agents[name]
     
+    @classmethod
+    def get_agent_instance(cls, name: str) -> BaseAgent:
+        """
+        Get the shared instance of an agent, creating it on first use.
+
+        Agents are expensive to construct (the Codegen agent parses its repository on
+        startup), so one instance per agent type is reused across all requests.
+
+        Args:
+            name: The name of the agent
+
+        Returns:
+            The agent instance
+        """
+        instance = cls._instances.get(name)
+        if instance is not None:
+            return instance
+
+        agent_class = cls.get_agent(name)
+        with cls._instances_lock:
+            instance = cls._instances.get(name)
+            if instance is None:
+                instance = agent_class()
+                cls._instances[name] = instance
+        return instance
+
+    @classmethod
+    def get_description(cls, name: str) -> str:
+        """
+        Get the description of an agent, as cached at registration.
+
+        Args:
+            name: The name of the agent
+
+        Returns:
+            The agent description
+        """
+        cls._ensure_default_agents()
+        if name not in cls._descriptions:
+            raise ValueError(f"Unknown agent: {name}")
+        return cls._descriptions[name]
+
+    @classmethod
+    def get_help_text(cls) -> str:
+        """
+        Get the formatted list of available agents and their descriptions.
+
+        Returns:
+            The help text, or an empty string if no agents are registered
+        """
+        cls._ensure_default_agents()
+        return cls._help_text
+
     @classmethod
     def get_available_agents(cls) -> List[str]:
         """
@@ -50,11 +119,69 @@ class AgentRegistry:
         Returns:
             A list of agent names
         """
+        cls._ensure_default_agents()
         return list(cls._agents.keys())
+
+    @classmethod
+    def set_default_agent(cls, name: Optional[str]):
+        """
+        Set the agent used by users who have not picked one with `/agent use`.
+
+        Args:
+            name: The name of the agent, or None to use the default AI provider
+        """
+        cls._default_agent = name
+
+    @classmethod
+    def set_active_agent(cls, user_id: str, name: str):
+        """
+        Set the active agent for a single user.
+
+        Args:
+            user_id: The Slack user ID
+            name: The name of the agent
+        """
+        cls.get_agent(name)
+        with cls._active_lock:
+            cls._active_agents[user_id] = name
+
+    @classmethod
+    def get_active_agent(cls, user_id: Optional[str]) -> Optional[str]:
+        """
+        Get the active agent for a user, falling back to the default agent.
+
+        Args:
+            user_id: The Slack user ID
+
+        Returns:
+            The agent name, or None if no agent is active
+        """
+        cls._ensure_default_agents()
+        with cls._active_lock:
+            name = cls._active_agents.get(user_id, cls._default_agent)
+        return name if name in cls._agents else None
     
     @classmethod
     def register_default_agents(cls):
         """
         Register default agents with the registry.
+
+        The agent modules pull in heavy SDKs, so they are imported here rather than at
+        module import time. Lookups call this on first use if the app has not already.
         """
-        cls.register_agent("codegen", CodegenAgent)
\ No newline at end of file
+        with cls._defaults_lock:
+            if cls._defaults_registered:
+                return
+            try:
+                from .codegen_agent import CodegenAgent
+
+                cls.register_agent("codegen", CodegenAgent)
+            except ImportError as e:
+                logger.error(f"Codegen agent unavailable: {e}")
+            cls.set_default_agent(get_settings().active_agent)
+            cls._defaults_registered = True
+
+    @classmethod
+    def _ensure_default_agents(cls):
+        if not cls._defaults_registered:
+            cls.register_default_agents()
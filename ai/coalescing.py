@@ -0,0 +1,79 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Dict, List, Optional, Tuple
+
+from state_store.get_user_state import get_user_state
+
+from .ai_constants import DEFAULT_SYSTEM_CONTENT
+from .providers import get_provider_response
+
+logger = logging.getLogger(__name__)
+
+"""
+Single-flight coalescing of identical provider requests. When the same prompt, context and system prompt
+reach the same provider and model while an earlier request for them is still in flight (a double-sent
+message, or several users mentioning the bot with the same question), only the first one calls the
+provider and the rest wait for its answer. Enabled with `ENABLE_REQUEST_COALESCING`, since at low
+traffic there is nothing to coalesce and building the key is wasted work.
+"""
+
+COALESCING_ENABLED = os.environ.get("ENABLE_REQUEST_COALESCING", "").lower() in ("1", "true", "yes")
+
+# Seconds a duplicate request waits for the first one before calling the provider itself, so a hung
+# provider call doesn't also hold every worker that joined it
+COALESCE_WAIT_TIMEOUT = float(os.environ.get("COALESCE_WAIT_TIMEOUT", "30"))
+
+_in_flight: Dict[Tuple, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def get_coalesced_response(
+    user_id: str, prompt: str, context: Optional[List] = None, system_content: str = DEFAULT_SYSTEM_CONTENT
+) -> str:
+    """
+    Get a provider response, sharing it with identical requests that are in flight at the same time
+
+    Args:
+        user_id: The Slack user ID, used to look up the selected provider and model
+        prompt: The user prompt
+        context: Optional conversation context, as for `get_provider_response`
+        system_content: The system prompt
+
+    Returns:
+        The provider's response
+    """
+    if context is None:
+        context = []
+    if not COALESCING_ENABLED:
+        return get_provider_response(user_id, prompt, context, system_content)
+
+    user_state = get_user_state(user_id, False)
+    key = (*user_state, system_content, prompt, json.dumps(context, sort_keys=True))
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = _in_flight[key] = Future()
+
+    if not is_leader:
+        logger.info("Joining an identical in-flight provider request")
+        try:
+            return future.result(timeout=COALESCE_WAIT_TIMEOUT)
+        except TimeoutError:
+            logger.warning(f"Identical request still running after {COALESCE_WAIT_TIMEOUT}s, calling the provider directly")
+            return get_provider_response(user_id, prompt, context, system_content, user_state)
+
+    try:
+        # Pass the state along so the provider call doesn't load it a second time
+        response = get_provider_response(user_id, prompt, context, system_content, user_state)
+        future.set_result(response)
+        return response
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
@@ -0,0 +1,19 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared requests session for provider HTTP calls, Slack file downloads and transcription. Reusing it
+# keeps TLS connections alive between requests instead of paying a new handshake for every call.
+
+# Hosts whose connections are pooled: the LLM endpoints, Slack file storage and the transcription API
+POOL_HOSTS = 8
+
+# Connections kept per host; sized to the listener and background threads that may use the session at once,
+# so a burst doesn't close and reopen connections beyond the pool
+POOL_MAXSIZE = int(os.environ.get("LISTENER_WORKERS", "32")) + int(os.environ.get("BACKGROUND_WORKERS", "8"))
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
@@ -4,7 +4,7 @@ This module provides a singleton manager for handling different AI provider inst
 including character-specific instances for OpenAI and Anthropic.
 """
 import logging
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -18,25 +18,30 @@ class MultiInstanceManager:
         """
         self._openai_characters = {}
         self._anthropic_characters = {}
+        # Immutable snapshots of the character names, rebuilt only when a character is registered
+        self._openai_names: Tuple[str, ...] = ()
+        self._anthropic_names: Tuple[str, ...] = ()
+        # Bumped whenever a character is registered, so callers can cache views of the instance list
+        self.topology_version = 0
         logger.info("Initialized MultiInstanceManager")
     
-    def get_available_openai_characters(self) -> List[str]:
+    def get_available_openai_characters(self) -> Tuple[str, ...]:
         """
-        Get a list of available OpenAI character names.
+        Get the available OpenAI character names.
         
         Returns:
-            A list of character names
+            A tuple of character names
         """
-        return list(self._openai_characters.keys())
+        return self._openai_names
     
-    def get_available_anthropic_characters(self) -> List[str]:
+    def get_available_anthropic_characters(self) -> Tuple[str, ...]:
         """
-        Get a list of available Anthropic character names.
+        Get the available Anthropic character names.
         
         Returns:
-            A list of character names
+            A tuple of character names
         """
-        return list(self._anthropic_characters.keys())
+        return self._anthropic_names
     
     def get_openai_character(self, name: str) -> Optional[Any]:
         """
@@ -71,6 +76,8 @@ class MultiInstanceManager:
             instance: The character instance
         """
         self._openai_characters[name] = instance
+        self._openai_names = tuple(self._openai_characters)
+        self.topology_version += 1
         logger.info(f"Registered OpenAI character: {name}")
     
     def register_anthropic_character(self, name: str, instance: Any):
@@ -82,9 +89,19 @@ class MultiInstanceManager:
             instance: The character instance
         """
         self._anthropic_characters[name] = instance
+        self._anthropic_names = tuple(self._anthropic_characters)
+        self.topology_version += 1
         logger.info(f"Registered Anthropic character: {name}")
     
-    def generate_response(self, provider: str, character_name: str, model: str, prompt: str, system_content: str) -> str:
+    def generate_response(
+        self,
+        provider: str,
+        character_name: str,
+        model: str,
+        prompt: str,
+        system_content: str,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> str:
         """
         Generate a response using a specific character.
         
@@ -94,6 +111,7 @@ class MultiInstanceManager:
             model: The model name
             prompt: The prompt text
             system_content: The system content
+            history: Earlier conversation turns as role/content messages
             
         Returns:
             The generated response
@@ -103,13 +121,13 @@ class MultiInstanceManager:
             if not character:
                 raise ValueError(f"Unknown OpenAI character: {character_name}")
             character.set_model(model)
-            return character.generate_response(prompt, system_content)
+            return character.generate_response(prompt, system_content, history)
         elif provider.lower() == "anthropic":
             character = self.get_anthropic_character(character_name)
             if not character:
                 raise ValueError(f"Unknown Anthropic character: {character_name}")
             character.set_model(model)
-            return character.generate_response(prompt, system_content)
+            return character.generate_response(prompt, system_content, history)
         else:
             raise ValueError(f"Unsupported provider for character generation: {provider}")
 
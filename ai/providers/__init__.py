@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 
 from state_store.get_user_state import get_user_state
 
@@ -19,6 +19,8 @@ This function returns an instance of the appropriate API provider based on the g
 `get_provider_response`()
 This function retrieves the user's selected API provider and model,
 sets the model, and generates a response.
+`get_provider_response_stream()`
+The streaming variant of `get_provider_response`, yielding the response in chunks.
 Note that context is an optional parameter because some functionalities,
 such as commands, do not allow access to conversation history if the bot
 isn't in the channel where the command is run.
@@ -101,42 +103,117 @@ def parse_command_args(text: str) -> Tuple[Dict[str, str], str]:
     return args, " ".join(remaining_parts)
 
 
-def get_provider_response(user_id: str, prompt: str, context: Optional[List] = [], system_content=DEFAULT_SYSTEM_CONTENT):
-    formatted_context = "\n".join([f"{msg['user']}: {msg['text']}" for msg in context])
-    
+def _build_history(context: Optional[List], prompt: str) -> Tuple[List[Dict[str, str]], str]:
+    """
+    Convert conversation context into chat messages that precede the prompt, instead of formatting
+    it into the prompt text. The system prompt and earlier turns then form a stable prefix that
+    provider-side prompt caching can reuse from one turn to the next.
+
+    Returns:
+        A tuple of (history, prompt). History alternates roles and starts with a user message,
+        as Anthropic requires; a trailing user message is folded into the prompt.
+    """
+    history = []
+    for msg in context or []:
+        if msg["user"] == "Assistant":
+            role, content = "assistant", msg["text"]
+        elif msg["user"] == "User":
+            role, content = "user", msg["text"]
+        else:
+            # Slack messages keep the author so multi-user context stays attributable
+            role, content = "user", f"{msg['user']}: {msg['text']}"
+
+        if history and history[-1]["role"] == role:
+            history[-1]["content"] += "\n" + content
+        elif history or role == "user":
+            # A leading assistant turn has lost its question to truncation, so it is dropped
+            history.append({"role": role, "content": content})
+
+    if history and history[-1]["role"] == "user":
+        prompt = f"{history.pop()['content']}\n\n{prompt}"
+
+    return history, prompt
+
+
+def _prepare_request(
+    user_id: str, prompt: str, context: Optional[List], user_state: Optional[Tuple[str, str]] = None
+) -> Tuple[str, str, Optional[str], str, List[Dict[str, str]]]:
+    """
+    Resolve the provider, model, and optional character for a request and split the context into chat history.
+    `user_state` is the user's (provider_name, model_name) if the caller has already loaded it.
+
+    Returns:
+        A tuple of (provider_name, model_name, character_name, prompt, history)
+    """
     # Check if prompt contains character parameter
     args, remaining_text = parse_command_args(prompt)
     character_name = args.get("character")
     model_override = args.get("model")
-    
+
     # Use remaining text as prompt if args were extracted
     if args:
         prompt = remaining_text
-    
-    full_prompt = f"Prompt: {prompt}\nContext: {formatted_context}"
-    
-    try:
-        provider_name, model_name = get_user_state(user_id, False)
-        
-        # Override model if specified in args
-        if model_override:
-            model_name = model_override
-        
-        # Use the character instance manager if character_name is provided
-        if character_name:
-            response = manager.generate_response(
-                provider=provider_name,
-                character_name=character_name,
-                model=model_name,
-                prompt=full_prompt,
-                system_content=system_content
-            )
-        else:
-            # Use the traditional approach
-            provider = _get_provider(provider_name)
-            provider.set_model(model_name)
-            response = provider.generate_response(full_prompt, system_content)
-            
-        return response
-    except Exception as e:
-        raise e
+
+    history, prompt = _build_history(context, prompt)
+
+    provider_name, model_name = user_state or get_user_state(user_id, False)
+
+    # Override model if specified in args
+    if model_override:
+        model_name = model_override
+
+    return provider_name, model_name, character_name, prompt, history
+
+
+def get_provider_response(
+    user_id: str,
+    prompt: str,
+    context: Optional[List] = [],
+    system_content=DEFAULT_SYSTEM_CONTENT,
+    user_state: Optional[Tuple[str, str]] = None,
+):
+    provider_name, model_name, character_name, prompt, history = _prepare_request(user_id, prompt, context, user_state)
+
+    # Use the character instance manager if character_name is provided
+    if character_name:
+        return manager.generate_response(
+            provider=provider_name,
+            character_name=character_name,
+            model=model_name,
+            prompt=prompt,
+            system_content=system_content,
+            history=history,
+        )
+
+    # Use the traditional approach
+    provider = _get_provider(provider_name)
+    provider.set_model(model_name)
+    return provider.generate_response(prompt, system_content, history)
+
+
+def get_provider_response_stream(
+    user_id: str, prompt: str, context: Optional[List] = [], system_content=DEFAULT_SYSTEM_CONTENT
+) -> Iterator[str]:
+    """
+    Same as `get_provider_response`, but yields the response in chunks as the provider produces them.
+    Providers without a `generate_streaming_response` method yield the whole response as a single chunk.
+    """
+    provider_name, model_name, character_name, prompt, history = _prepare_request(user_id, prompt, context)
+
+    if character_name:
+        yield manager.generate_response(
+            provider=provider_name,
+            character_name=character_name,
+            model=model_name,
+            prompt=prompt,
+            system_content=system_content,
+            history=history,
+        )
+        return
+
+    provider = _get_provider(provider_name)
+    provider.set_model(model_name)
+    if hasattr(provider, "generate_streaming_response"):
+        yield from provider.generate_streaming_response(prompt, system_content, history)
+    else:
+        yield provider.generate_response(prompt, system_content, history)
@@ -1,4 +1,4 @@
-from .base_provider import BaseAPIProvider
+from .base_provider import BaseAPIProvider, PROVIDER_TIMEOUT
 import anthropic
 import os
 import logging
@@ -42,7 +42,7 @@ class AnthropicAPI(BaseAPIProvider):
         
         # Initialize the client
         if self.api_key:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            self.client = anthropic.Anthropic(api_key=self.api_key, timeout=PROVIDER_TIMEOUT)
         else:
             self.client = None
             logger.warning(f"No API key found for Anthropic character '{character_name}'")
@@ -68,7 +68,7 @@ class AnthropicAPI(BaseAPIProvider):
         else:
             return {}
 
-    def generate_response(self, prompt: str, system_content: str) -> str:
+    def generate_response(self, prompt: str, system_content: str, history: list = None) -> str:
         try:
             if not self.client:
                 raise ValueError(f"No valid API key for Anthropic character '{self.character_name}'")
@@ -76,7 +76,7 @@ class AnthropicAPI(BaseAPIProvider):
             response = self.client.messages.create(
                 model=self.current_model,
                 system=system_content,
-                messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+                messages=[*(history or []), {"role": "user", "content": [{"type": "text", "text": prompt}]}],
                 max_tokens=self.MODELS[self.current_model]["max_tokens"],
             )
             return response.content[0].text
@@ -92,3 +92,20 @@ class AnthropicAPI(BaseAPIProvider):
         except anthropic.APIStatusError as e:
             logger.error(f"Another non-200-range status code was received: {e.status_code}")
             raise e
+
+    def generate_streaming_response(self, prompt: str, system_content: str, history: list = None):
+        if not self.client:
+            raise ValueError(f"No valid API key for Anthropic character '{self.character_name}'")
+
+        try:
+            with self.client.messages.stream(
+                model=self.current_model,
+                system=system_content,
+                messages=[*(history or []), {"role": "user", "content": [{"type": "text", "text": prompt}]}],
+                max_tokens=self.MODELS[self.current_model]["max_tokens"],
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except anthropic.APIError as e:
+            logger.error(f"Error streaming response from Anthropic: {e}")
+            raise e
@@ -1,4 +1,11 @@
 # A base class for API providers, defining the interface and common properties for subclasses.
+# `history` holds earlier turns as {"role": "user" | "assistant", "content": str} messages, oldest first.
+import os
+from typing import Dict, List, Optional
+
+# Seconds a provider request may wait on the API before failing, so a hung upstream surfaces as an
+# error instead of holding a worker thread indefinitely
+PROVIDER_TIMEOUT = float(os.environ.get("PROVIDER_TIMEOUT", "60"))
 
 
 class BaseAPIProvider(object):
@@ -8,5 +15,5 @@ class BaseAPIProvider(object):
     def get_models(self) -> dict:
         raise NotImplementedError("Subclass must implement get_models")
 
-    def generate_response(self, prompt: str, system_content: str) -> str:
+    def generate_response(self, prompt: str, system_content: str, history: Optional[List[Dict[str, str]]] = None) -> str:
         raise NotImplementedError("Subclass must implement generate_response")
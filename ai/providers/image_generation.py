@@ -1,9 +1,11 @@
 import os
-import requests
 import json
 import logging
 from typing import Optional
 
+from ..http_pool import session
+from .base_provider import PROVIDER_TIMEOUT
+
 logger = logging.getLogger(__name__)
 
 def generate_image(prompt: str, size: str = "1024x1024") -> Optional[str]:
@@ -51,10 +53,11 @@ def generate_image(prompt: str, size: str = "1024x1024") -> Optional[str]:
             "size": size
         }
         
-        response = requests.post(
+        response = session.post(
             f"{base_url}/images/generations",
             headers=headers,
-            data=json.dumps(data)
+            data=json.dumps(data),
+            timeout=PROVIDER_TIMEOUT
         )
         
         if response.status_code != 200:
@@ -1,7 +1,8 @@
 import os
 import requests
 import logging
-from .base_provider import BaseAPIProvider
+from ..http_pool import session
+from .base_provider import BaseAPIProvider, PROVIDER_TIMEOUT
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
@@ -94,7 +95,7 @@ class LocalAI_API(BaseAPIProvider):
         else:
             return {}
 
-    def generate_response(self, prompt: str, system_content: str) -> str:
+    def generate_response(self, prompt: str, system_content: str, history: list = None) -> str:
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -105,15 +106,17 @@ class LocalAI_API(BaseAPIProvider):
                 "model": self.current_model,
                 "messages": [
                     {"role": "system", "content": system_content},
+                    *(history or []),
                     {"role": "user", "content": prompt}
                 ],
                 "max_tokens": self.MODELS[self.current_model]["max_tokens"]
             }
             
-            response = requests.post(
+            response = session.post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
-                json=payload
+                json=payload,
+                timeout=PROVIDER_TIMEOUT
             )
             
             if response.status_code != 200:
@@ -1,5 +1,5 @@
 import openai
-from .base_provider import BaseAPIProvider
+from .base_provider import BaseAPIProvider, PROVIDER_TIMEOUT
 import os
 import logging
 from env_loader import get_api_keys
@@ -39,7 +39,7 @@ class OpenAI_API(BaseAPIProvider):
         
         # Initialize the client
         if self.api_key:
-            self.client = openai.OpenAI(api_key=self.api_key)
+            self.client = openai.OpenAI(api_key=self.api_key, timeout=PROVIDER_TIMEOUT)
         else:
             self.client = None
             logger.warning(f"No API key found for OpenAI character '{character_name}'")
@@ -65,7 +65,7 @@ class OpenAI_API(BaseAPIProvider):
         else:
             return {}
 
-    def generate_response(self, prompt: str, system_content: str) -> str:
+    def generate_response(self, prompt: str, system_content: str, history: list = None) -> str:
         try:
             if not self.client:
                 raise ValueError(f"No valid API key for OpenAI character '{self.character_name}'")
@@ -73,7 +73,11 @@ class OpenAI_API(BaseAPIProvider):
             response = self.client.chat.completions.create(
                 model=self.current_model,
                 n=1,
-                messages=[{"role": "system", "content": system_content}, {"role": "user", "content": prompt}],
+                messages=[
+                    {"role": "system", "content": system_content},
+                    *(history or []),
+                    {"role": "user", "content": prompt},
+                ],
                 max_tokens=self.MODELS[self.current_model]["max_tokens"],
             )
             return response.choices[0].message.content
@@ -89,3 +93,26 @@ class OpenAI_API(BaseAPIProvider):
         except openai.APIStatusError as e:
             logger.error(f"Another non-200-range status code was received: {e.status_code}")
             raise e
+
+    def generate_streaming_response(self, prompt: str, system_content: str, history: list = None):
+        if not self.client:
+            raise ValueError(f"No valid API key for OpenAI character '{self.character_name}'")
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.current_model,
+                n=1,
+                messages=[
+                    {"role": "system", "content": system_content},
+                    *(history or []),
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=self.MODELS[self.current_model]["max_tokens"],
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except openai.APIError as e:
+            logger.error(f"Error streaming response from OpenAI: {e}")
+            raise e
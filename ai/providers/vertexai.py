@@ -88,7 +88,11 @@ class VertexAPI(BaseAPIProvider):
         else:
             return {}
 
-    def generate_response(self, prompt: str, system_content: str) -> str:
+    def generate_response(self, prompt: str, system_content: str, history: list = None) -> str:
+        # Earlier turns go ahead of the prompt, after the (static) system instruction
+        if history:
+            prompt = "\n".join(f"{msg['role']}: {msg['content']}" for msg in history) + "\n" + prompt
+
         system_instruction = None
         if self.MODELS[self.current_model]["system_instruction_supported"]:
             system_instruction = system_content
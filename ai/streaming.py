@@ -1,4 +1,5 @@
 import logging
+import os
 import threading
 import time
 from typing import Callable, Dict, List, Optional, Any
@@ -7,12 +8,32 @@ import queue
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
+# Streamed message updates start small so the first words show up quickly, then grow by STREAM_GROWTH
+# after each update up to STREAM_MAX_BATCH chunks, keeping long responses well under Slack's rate limits
+STREAM_MIN_BATCH = int(os.environ.get("STREAM_MIN_BATCH", 8))
+STREAM_MAX_BATCH = int(os.environ.get("STREAM_MAX_BATCH", 120))
+STREAM_GROWTH = float(os.environ.get("STREAM_GROWTH", 3.0))
+
 class StreamingResponseHandler:
     """
     Handler for streaming responses from AI providers
     """
     
-    def __init__(self, client, channel_id: str, thread_ts: Optional[str] = None):
+    def __init__(
+        self,
+        client,
+        channel_id: str,
+        thread_ts: Optional[str] = None,
+        message_ts: Optional[str] = None,
+        update_interval: float = 0.5,
+        buffer_chars: int = 0,
+        min_batch: int = STREAM_MIN_BATCH,
+        max_batch: int = STREAM_MAX_BATCH,
+        growth: float = STREAM_GROWTH,
+        render: Optional[Callable[[str], list]] = None,
+        respond: Optional[Callable[..., Any]] = None,
+        max_updates: Optional[int] = None,
+    ):
         """
         Initialize the streaming response handler
         
@@ -20,17 +41,38 @@ class StreamingResponseHandler:
             client: Slack client
             channel_id: Channel ID to post messages to
             thread_ts: Optional thread timestamp for threaded responses
+            message_ts: Optional timestamp of an existing message to stream into instead of posting a new one
+            update_interval: Minimum number of seconds between message updates
+            buffer_chars: Minimum number of new characters before an intermediate update is sent,
+                so slow token streams don't spend an API call on every few words
+            min_batch: Number of new chunks before the first intermediate update
+            max_batch: Largest number of new chunks an intermediate update waits for
+            growth: Factor the batch size grows by after each intermediate update
+            render: Builds the message blocks for the text so far. Needed when the message already has
+                blocks, since `chat_update` without blocks keeps the old ones and the text never shows
+            respond: Bolt `respond` for a message that can only be edited through its response_url, like an
+                ephemeral one; used instead of `chat_update`
+            max_updates: Most updates to send, counting the final one. A response_url accepts five responses
         """
         self.client = client
         self.channel_id = channel_id
         self.thread_ts = thread_ts
-        self.message_ts = None
+        self.message_ts = message_ts
         self.buffer = ""
         self.last_update_time = 0
-        self.update_interval = 0.5  # Update message every 0.5 seconds
+        self.update_interval = update_interval
+        self.buffer_chars = buffer_chars
+        self.batch_size = min_batch
+        self.max_batch = max_batch
+        self.growth = growth
+        self.render = render
+        self.respond = respond
+        self.max_updates = max_updates
+        self.updates_sent = 0
         self.queue = queue.Queue()
         self.is_complete = False
         self.is_running = False
+        self._thread = None
         
     def start(self):
         """Start the streaming response handler"""
@@ -38,15 +80,17 @@ class StreamingResponseHandler:
         self.last_update_time = time.time()
         
         # Create initial message
-        response = self.client.chat_postMessage(
-            channel=self.channel_id,
-            text="⏳ Thinking...",
-            thread_ts=self.thread_ts
-        )
-        self.message_ts = response["ts"]
+        if not self.message_ts:
+            response = self.client.chat_postMessage(
+                channel=self.channel_id,
+                text="⏳ Thinking...",
+                thread_ts=self.thread_ts
+            )
+            self.message_ts = response["ts"]
         
         # Start update thread
-        threading.Thread(target=self._update_message_loop, daemon=True).start()
+        self._thread = threading.Thread(target=self._update_message_loop, daemon=True)
+        self._thread.start()
         
     def add_content(self, content: str):
         """
@@ -60,33 +104,47 @@ class StreamingResponseHandler:
     def complete(self):
         """Mark the streaming response as complete"""
         self.is_complete = True
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until all queued content has been flushed to the message"""
+        if self._thread:
+            self._thread.join(timeout)
         
     def _update_message_loop(self):
         """Update message loop that runs in a separate thread"""
+        sent_text = ""
+        pending_chunks = 0
         while self.is_running:
             try:
+                # Read the flag before draining so that everything added before `complete()` gets flushed
+                is_complete = self.is_complete
+
                 # Process all available content in the queue
                 while not self.queue.empty():
                     self.buffer += self.queue.get_nowait()
+                    pending_chunks += 1
                 
                 current_time = time.time()
-                # Update the message if enough time has passed or the response is complete
-                if (current_time - self.last_update_time >= self.update_interval) or self.is_complete:
-                    if self.buffer:
-                        # Replace "Thinking..." with actual content on first update
-                        text = self.buffer
-                        
+                # Update the message if enough time has passed and enough new text has arrived, or the response is complete
+                due = (
+                    current_time - self.last_update_time >= self.update_interval
+                    and len(self.buffer) - len(sent_text) >= self.buffer_chars
+                    and pending_chunks >= self.batch_size
+                    # Always leave room for the final update
+                    and (self.max_updates is None or self.updates_sent < self.max_updates - 1)
+                )
+                if due or is_complete:
+                    if self.buffer and self.buffer != sent_text:
                         # Update the message
-                        self.client.chat_update(
-                            channel=self.channel_id,
-                            ts=self.message_ts,
-                            text=text
-                        )
+                        self._send_update(self.buffer)
+                        sent_text = self.buffer
+                        pending_chunks = 0
+                        self.batch_size = min(self.max_batch, int(self.batch_size * self.growth))
                         
                         self.last_update_time = current_time
                 
-                # If complete and no more content in queue, exit loop
-                if self.is_complete and self.queue.empty():
+                # If complete, the final update has been sent
+                if is_complete:
                     self.is_running = False
                     break
                     
@@ -98,6 +156,15 @@ class StreamingResponseHandler:
                 self.is_running = False
                 break
 
+    def _send_update(self, text: str):
+        blocks = {"blocks": self.render(text)} if self.render else {}
+        if self.respond:
+            self.respond(text=text, replace_original=True, **blocks)
+        else:
+            self.client.chat_update(channel=self.channel_id, ts=self.message_ts, text=text, **blocks)
+        self.updates_sent += 1
+
+
 def stream_response(provider_name: str, model_name: str, prompt: str, system_content: str, 
                    client, channel_id: str, thread_ts: Optional[str] = None) -> str:
     """
@@ -135,12 +202,14 @@ def stream_response(provider_name: str, model_name: str, prompt: str, system_con
                 
             # Mark as complete
             handler.complete()
+            handler.wait()
             return handler.buffer
         else:
             # Fall back to non-streaming API
             response = provider.generate_response(prompt, system_content)
             handler.add_content(response)
             handler.complete()
+            handler.wait()
             return response
             
     except Exception as e:
@@ -0,0 +1,123 @@
+import os
+import shutil
+import subprocess
+from logging import Logger
+from typing import Optional
+
+from .http_pool import session
+
+"""
+Speech-to-text for voice messages, using the OpenAI-compatible `/audio/transcriptions` endpoint.
+When ffmpeg is available, audio is first converted to 16 kHz mono 16-bit PCM: speech models work at
+that rate anyway, and the upload is several times smaller than Slack's 48 kHz stereo recordings.
+"""
+
+TRANSCRIPTION_MODEL = "whisper-1"
+
+# Seconds allowed for the download, the conversion and the transcription request respectively
+DOWNLOAD_TIMEOUT = 30
+CONVERT_TIMEOUT = 60
+TRANSCRIBE_TIMEOUT = 60
+
+# Upload names for formats the endpoint only accepts under another extension; Opus audio is an Ogg stream
+_UPLOAD_FORMATS = {"opus": "ogg"}
+
+_FFMPEG = shutil.which("ffmpeg")
+_FFMPEG_ARGS = ("-i", "pipe:0", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", "-f", "wav", "pipe:1")
+
+
+def _to_pcm_wav(audio: bytes, logger: Logger) -> Optional[bytes]:
+    """
+    Convert audio to 16 kHz mono 16-bit PCM WAV with ffmpeg.
+
+    Args:
+        audio: The encoded audio
+        logger: Logger for conversion failures
+
+    Returns:
+        The WAV bytes, or None if ffmpeg is missing or couldn't convert this input
+    """
+    if not _FFMPEG:
+        return None
+    try:
+        result = subprocess.run(
+            [_FFMPEG, "-loglevel", "error", *_FFMPEG_ARGS],
+            input=audio,
+            capture_output=True,
+            timeout=CONVERT_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"Audio conversion failed, sending the original file: {e}")
+        return None
+    if result.returncode != 0 or not result.stdout:
+        # Some containers (m4a with the index at the end) can't be read from a pipe
+        logger.warning(f"Audio conversion failed, sending the original file: {result.stderr.decode(errors='replace')}")
+        return None
+    return result.stdout
+
+
+def transcribe_audio_bytes(audio: bytes, file_format: str, logger: Logger) -> str:
+    """
+    Transcribe audio, converting it to 16 kHz mono PCM first when possible.
+
+    Args:
+        audio: The encoded audio
+        file_format: The audio's file extension, e.g. "m4a"
+        logger: Logger for errors
+
+    Returns:
+        The transcription, or a message starting with "Error:" if it failed
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    base_url = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    if not api_key:
+        logger.error("No OpenAI API key found in environment variables")
+        return "Error: No API key configured for transcription."
+
+    wav = _to_pcm_wav(audio, logger)
+    if wav is not None:
+        audio, file_format = wav, "wav"
+    else:
+        file_format = _UPLOAD_FORMATS.get(file_format, file_format)
+
+    try:
+        response = session.post(
+            f"{base_url}/audio/transcriptions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            data={"model": TRANSCRIPTION_MODEL},
+            files={"file": (f"voice.{file_format}", audio)},
+            timeout=TRANSCRIBE_TIMEOUT,
+        )
+    except Exception as e:
+        logger.error(f"Error transcribing audio: {e}")
+        return f"Error: {e}"
+
+    if response.status_code != 200:
+        logger.error(f"Transcription API error: {response.status_code} - {response.text}")
+        return f"Error: Transcription failed with status {response.status_code}."
+    return response.json().get("text", "")
+
+
+def transcribe_audio(file_url: str, logger: Logger, token: str = None, file_format: str = None) -> str:
+    """
+    Download a Slack-hosted audio file and transcribe it.
+
+    Args:
+        file_url: The file's private URL
+        logger: Logger for errors
+        token: Bot token authorizing the download
+        file_format: The audio's file extension; taken from the URL when omitted
+
+    Returns:
+        The transcription, or a message starting with "Error:" if it failed
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        response = session.get(file_url, headers=headers, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Error downloading voice message: {e}")
+        return f"Error: Couldn't download the voice message ({e})."
+
+    file_format = file_format or file_url.rsplit(".", 1)[-1].split("?", 1)[0].lower()
+    return transcribe_audio_bytes(response.content, file_format, logger)
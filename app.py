@@ -3,9 +3,12 @@ import logging
 
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_sdk import WebClient
+from slack_sdk.http_retry.builtin_handlers import ConnectionErrorRetryHandler, RateLimitErrorRetryHandler
 from fastapi import FastAPI
 import uvicorn
 from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 
 from listeners import register_listeners
 from env_loader import load_environment_variables
@@ -16,7 +19,18 @@ from agents.agent_registry import AgentRegistry
 load_environment_variables()
 
 # Initialization
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
+# Bolt copies this client's timeout and retry handlers into the client it hands to each listener
+client = WebClient(
+    token=os.environ.get("SLACK_BOT_TOKEN"),
+    timeout=int(os.environ.get("SLACK_API_TIMEOUT", 10)),
+    retry_handlers=[ConnectionErrorRetryHandler(max_retry_count=2), RateLimitErrorRetryHandler(max_retry_count=2)],
+)
+# Listeners block on Slack and AI provider calls, so run more of them at once than Bolt's default pool allows
+LISTENER_WORKERS = int(os.environ.get("LISTENER_WORKERS", 32))
+app = App(
+    client=client,
+    listener_executor=ThreadPoolExecutor(max_workers=LISTENER_WORKERS, thread_name_prefix="bolty-listener"),
+)
 logging.basicConfig(level=logging.DEBUG)
 
 # Create FastAPI app
@@ -28,12 +42,9 @@ register_listeners(app)
 # Register GitHub webhook handler
 register_webhook_handler(app)
 
-# Register default agents
-AgentRegistry.register_default_agents()
-
 # Define function to start Bolt app
 def start_bolt_app():
-    SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN")).start()
+    SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"), concurrency=LISTENER_WORKERS).start()
 
 # Function to select an agent
 def select_agent():
@@ -45,8 +56,7 @@ def select_agent():
     
     print("Available agents:")
     for i, agent_name in enumerate(available_agents, 1):
-        agent_class = AgentRegistry.get_agent(agent_name)
-        print(f"{i}. {agent_name} - {agent_class.get_description()}")
+        print(f"{i}. {agent_name} - {AgentRegistry.get_description(agent_name)}")
     
     try:
         choice = input("Select an agent (number) or press Enter for default AI: ")
@@ -58,7 +68,7 @@ def select_agent():
         if 1 <= choice <= len(available_agents):
             selected_agent = available_agents[choice - 1]
             print(f"Selected agent: {selected_agent}")
-            os.environ["ACTIVE_AGENT"] = selected_agent
+            AgentRegistry.set_default_agent(selected_agent)
             return selected_agent
         else:
             print("Invalid choice. Using default AI provider.")
@@ -67,11 +77,20 @@ def select_agent():
         print("Invalid input. Using default AI provider.")
         return None
 
+# Build the default agent ahead of the first message; for Codegen this starts the repository parse
+def warm_default_agent():
+    default_agent = AgentRegistry.get_active_agent(None)
+    if default_agent:
+        AgentRegistry.get_agent_instance(default_agent)
+
 # Start Bolt app
 if __name__ == "__main__":
     # Select an agent
     selected_agent = select_agent()
     
+    # Warm the agent in the background so Slack readiness isn't delayed
+    Thread(target=warm_default_agent, daemon=True).start()
+    
     # Start Bolt app in a separate thread
     bolt_thread = Thread(target=start_bolt_app)
     bolt_thread.daemon = True
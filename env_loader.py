@@ -4,8 +4,13 @@ import re
 from dotenv import load_dotenv
 from pathlib import Path
 
+from settings import get_settings
+
 logger = logging.getLogger(__name__)
 
+# Matches OPENAI_CHARACTER_NAME / ANTHROPIC_CHARACTER_NAME, where NAME is the character name
+CHARACTER_KEY_PATTERN = re.compile(r'(OPENAI|ANTHROPIC)_CHARACTER_([A-Za-z0-9_]+)')
+
 def load_environment_variables():
     """
     Load and normalize environment variables for the application.
@@ -20,32 +25,24 @@ def load_environment_variables():
     else:
         logger.warning("No .env file found. Using environment variables from the system.")
     
-    # Process character-based API keys for OpenAI
+    # Collect character-based API keys for OpenAI and Anthropic in a single pass over the environment
     openai_characters = {}
+    anthropic_characters = {}
     for key, value in os.environ.items():
-        # Match OPENAI_CHARACTER_NAME, where NAME is the character name
-        match = re.match(r'OPENAI_CHARACTER_([A-Za-z0-9_]+)', key)
+        match = CHARACTER_KEY_PATTERN.match(key)
         if match:
-            character_name = match.group(1)
-            openai_characters[character_name] = value
+            provider, character_name = match.groups()
+            characters = openai_characters if provider == "OPENAI" else anthropic_characters
+            characters[character_name] = value
     
     # Store the keys in a structured format
     if openai_characters:
-        os.environ["OPENAI_CHARACTER_KEYS"] = ",".join([f"{k}:{v}" for k, v in openai_characters.items()])
+        os.environ["OPENAI_CHARACTER_KEYS"] = ",".join(f"{k}:{v}" for k, v in openai_characters.items())
         logger.info(f"Loaded {len(openai_characters)} OpenAI character API keys")
     
-    # Process character-based API keys for Anthropic
-    anthropic_characters = {}
-    for key, value in os.environ.items():
-        # Match ANTHROPIC_CHARACTER_NAME, where NAME is the character name
-        match = re.match(r'ANTHROPIC_CHARACTER_([A-Za-z0-9_]+)', key)
-        if match:
-            character_name = match.group(1)
-            anthropic_characters[character_name] = value
-    
     # Store the keys in a structured format
     if anthropic_characters:
-        os.environ["ANTHROPIC_CHARACTER_KEYS"] = ",".join([f"{k}:{v}" for k, v in anthropic_characters.items()])
+        os.environ["ANTHROPIC_CHARACTER_KEYS"] = ",".join(f"{k}:{v}" for k, v in anthropic_characters.items())
         logger.info(f"Loaded {len(anthropic_characters)} Anthropic character API keys")
     
     # Map OPENAI_* variables to LOCALAI_* variables if they don't exist
@@ -72,6 +69,9 @@ def load_environment_variables():
         logger.info(f"API Key: {masked_key}")
     else:
         logger.warning("No API key found in environment variables")
+
+    # The environment was just rewritten, so drop any settings snapshot taken before it
+    get_settings.cache_clear()
     
     # Log number of character API keys
     if "OPENAI_CHARACTER_KEYS" in os.environ:
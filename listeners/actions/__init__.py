@@ -1,3 +1,5 @@
+import re
+
 from slack_bolt import App
 from .set_user_selection import set_user_selection
 from .interactive_components import handle_button_click
@@ -6,7 +8,7 @@ from .interactive_components import handle_button_click
 def register(app: App):
     app.action("pick_a_provider")(set_user_selection)
     
-    # Register button click handlers
-    app.action({"action_id": "regenerate_.*"})(handle_button_click)
-    app.action({"action_id": "feedback_helpful_.*"})(handle_button_click)
-    app.action({"action_id": "feedback_not_helpful_.*"})(handle_button_click)
+    # Register button click handlers; a plain string action_id only matches exactly
+    app.action({"action_id": re.compile(r"^regenerate_")})(handle_button_click)
+    app.action({"action_id": re.compile(r"^feedback_helpful_")})(handle_button_click)
+    app.action({"action_id": re.compile(r"^feedback_not_helpful_")})(handle_button_click)
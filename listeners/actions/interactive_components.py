@@ -1,33 +1,147 @@
-from slack_bolt import Ack, BoltContext
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from cachetools import TTLCache
+from slack_bolt import Ack, BoltContext, Respond
 from slack_sdk import WebClient
 from logging import Logger
-from ai.providers import get_provider_response
-from state_store.conversation_memory import add_to_conversation_history, get_conversation_history
+from ai.providers import get_provider_response_stream
+from ai.streaming import StreamingResponseHandler
+from state_store.conversation_memory import get_conversation_history
+from state_store.async_writer import enqueue_history_add
 from state_store.user_preferences import get_user_preferences, get_system_prompt
-import json
-import uuid
+from ..listener_utils.message_blocks import (
+    FEEDBACK_HELPFUL_BLOCK,
+    FEEDBACK_NOT_HELPFUL_BLOCK,
+    action_base,
+    get_response_blocks,
+    make_message_block,
+    make_response_blocks,
+    make_try_again_block,
+)
 
-def handle_button_click(ack: Ack, body: dict, client: WebClient, context: BoltContext, logger: Logger):
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between partial updates while a regenerated response streams in
+STREAM_UPDATE_INTERVAL = 0.8
+
+# Responses with buttons are ephemeral, so they are edited through the click's response_url, which accepts
+# five responses: the regenerating notice, the streamed updates and the final response with new buttons
+STREAM_MAX_UPDATES = 3
+
+# Feedback clicks already handled, so double-clicks and Slack redeliveries don't update the message twice
+FEEDBACK_DEDUPE_TTL = 60
+_feedback_seen = TTLCache(maxsize=10000, ttl=FEEDBACK_DEDUPE_TTL)
+_feedback_lock = threading.Lock()
+
+
+def _is_duplicate_feedback(channel_id: str, message_ts: str, action_id: str) -> bool:
+    # The full action_id: a regenerated response keeps its ts but gets buttons with a new id,
+    # and feedback on the new response must still go through
+    key = f"{channel_id}:{message_ts}:{action_id}"
+    with _feedback_lock:
+        if key in _feedback_seen:
+            return True
+        _feedback_seen[key] = True
+        return False
+
+
+class _UpdateBatcher:
+    """
+    Collects message updates and sends them from a background thread every `interval` seconds.
+    Updates queued for the same message within one window are coalesced into a single call,
+    and the calls for different messages are sent concurrently. Each update carries the function
+    that sends it, so a message can be edited with `chat_update` or through a response_url.
+    """
+
+    def __init__(self, interval: float = 0.2, max_workers: int = 4):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-update")
+        self._thread = None
+
+    def submit(self, channel_id: str, ts: str, send: Callable[..., Any], **payload):
+        with self._lock:
+            # The latest update for a message wins; earlier ones in the same window are never sent
+            self._pending[(channel_id, ts)] = (send, payload)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for (channel_id, ts), (send, payload) in pending.items():
+            self._executor.submit(self._send, channel_id, ts, send, payload)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    @staticmethod
+    def _send(channel_id: str, ts: str, send: Callable[..., Any], payload: dict):
+        try:
+            send(**payload)
+        except Exception as e:
+            logger.error(f"Error updating message {ts} in {channel_id}: {e}")
+
+
+update_batcher = _UpdateBatcher()
+
+
+def _strip_actions_block(blocks: list) -> list:
+    # The buttons are always the last block of a response we built, so a slice is enough
+    if blocks and blocks[-1].get("type") == "actions":
+        return blocks[:-1]
+    return [block for block in blocks if block.get("type") != "actions"]
+
+
+def _acknowledge_feedback(
+    respond: Respond, channel_id: str, message_ts: str, original_blocks: list, feedback_blocks: list
+):
+    if not original_blocks:
+        # The response's blocks are gone (e.g. after a restart), so acknowledge in a new message
+        # rather than replace the response with the feedback alone
+        update_batcher.submit(channel_id, message_ts, respond, blocks=feedback_blocks)
+        return
+    update_batcher.submit(
+        channel_id,
+        message_ts,
+        respond,
+        blocks=[*_strip_actions_block(original_blocks), *feedback_blocks],
+        replace_original=True,
+    )
+
+
+def handle_button_click(
+    ack: Ack, body: dict, client: WebClient, respond: Respond, context: BoltContext, logger: Logger
+):
     """
     Handle button click actions in interactive messages
     """
+    # Acknowledge before touching the payload so Slack's 3 second deadline never depends on our work
+    ack()
+
     try:
-        ack()
-        
         # Extract necessary information
         user_id = body["user"]["id"]
         channel_id = body["channel"]["id"]
-        message_ts = body["message"]["ts"]
+        message_ts = body["container"]["message_ts"]
         action_id = body["actions"][0]["action_id"]
         
-        # Get the original message
-        original_message = body["message"]
+        # Get the original message's blocks. Payloads from ephemeral messages don't include the message,
+        # so those come from the blocks kept when the response was sent
+        original_blocks = body.get("message", {}).get("blocks") or get_response_blocks(action_id) or []
         
         # Handle different button actions
         if action_id.startswith("regenerate_"):
             # Extract the original prompt from the message
             original_prompt = None
-            for block in original_message.get("blocks", []):
+            for block in original_blocks:
                 if block.get("type") == "rich_text":
                     for element in block.get("elements", []):
                         if element.get("type") == "rich_text_quote":
@@ -44,145 +158,92 @@ def handle_button_click(ack: Ack, body: dict, client: WebClient, context: BoltCo
                 )
                 return
             
-            # Update the message to show "regenerating"
-            client.chat_update(
-                channel=channel_id,
-                ts=message_ts,
-                text="⏳ Regenerating response..."
+            # Update the message to show "regenerating". Blocks go with every update of this message, since
+            # an update without them keeps the old blocks and the new text would never show
+            respond(
+                text="⏳ Regenerating response...",
+                blocks=[make_message_block(original_prompt, "⏳ Regenerating response...")],
+                replace_original=True,
             )
             
             # Get user preferences
             preferences = get_user_preferences(user_id)
+            memory_enabled = preferences["memory_enabled"]
             
             # Get conversation history if memory is enabled
             conversation_context = []
-            if preferences["memory_enabled"]:
+            if memory_enabled:
                 conversation_context = get_conversation_history(user_id, channel_id)
             
             # Get system prompt based on user preferences
-            system_content = get_system_prompt(user_id)
+            system_content = get_system_prompt(user_id, preferences)
             
-            # Generate new response
+            # Generate new response, streaming partial output into the message as it arrives
             try:
-                new_response = get_provider_response(user_id, original_prompt, conversation_context, system_content)
+                stream = StreamingResponseHandler(
+                    client,
+                    channel_id,
+                    message_ts=message_ts,
+                    update_interval=STREAM_UPDATE_INTERVAL,
+                    render=lambda partial: [make_message_block(original_prompt, partial)],
+                    respond=respond,
+                    max_updates=STREAM_MAX_UPDATES,
+                )
+                stream.start()
+                chunks = []
+                try:
+                    response_stream = get_provider_response_stream(
+                        user_id, original_prompt, conversation_context, system_content
+                    )
+                    for chunk in response_stream:
+                        chunks.append(chunk)
+                        stream.add_content(chunk)
+                finally:
+                    stream.complete()
+                    stream.wait()
+                new_response = "".join(chunks)
                 
                 # Update the message with the new response
-                client.chat_update(
-                    channel=channel_id,
-                    ts=message_ts,
-                    blocks=[
-                        {
-                            "type": "rich_text",
-                            "elements": [
-                                {
-                                    "type": "rich_text_quote",
-                                    "elements": [{"type": "text", "text": original_prompt}],
-                                },
-                                {
-                                    "type": "rich_text_section",
-                                    "elements": [{"type": "text", "text": new_response}],
-                                },
-                            ],
-                        },
-                        {
-                            "type": "actions",
-                            "elements": [
-                                {
-                                    "type": "button",
-                                    "text": {"type": "plain_text", "text": "🔄 Regenerate", "emoji": True},
-                                    "action_id": f"regenerate_{uuid.uuid4()}",
-                                    "style": "primary"
-                                },
-                                {
-                                    "type": "button",
-                                    "text": {"type": "plain_text", "text": "👍 Helpful", "emoji": True},
-                                    "action_id": f"feedback_helpful_{uuid.uuid4()}"
-                                },
-                                {
-                                    "type": "button",
-                                    "text": {"type": "plain_text", "text": "👎 Not Helpful", "emoji": True},
-                                    "action_id": f"feedback_not_helpful_{uuid.uuid4()}"
-                                }
-                            ]
-                        }
-                    ]
+                respond(
+                    text=new_response,
+                    blocks=make_response_blocks(original_prompt, new_response),
+                    replace_original=True,
                 )
                 
                 # Add new response to conversation history if memory is enabled
-                if preferences["memory_enabled"]:
-                    add_to_conversation_history(user_id, new_response, False, channel_id)
+                if memory_enabled:
+                    enqueue_history_add(user_id, new_response, False, channel_id)
                     
             except Exception as e:
                 logger.error(f"Error regenerating response: {e}")
-                client.chat_update(
-                    channel=channel_id,
-                    ts=message_ts,
-                    text=f"Error regenerating response: {e}"
+                respond(
+                    text=f"Error regenerating response: {e}",
+                    blocks=[
+                        make_message_block(original_prompt, f"Error regenerating response: {e}"),
+                        make_try_again_block(action_base(action_id)),
+                    ],
+                    replace_original=True,
                 )
                 
+        elif action_id.startswith("feedback_") and _is_duplicate_feedback(channel_id, message_ts, action_id):
+            logger.debug(f"Ignoring repeated feedback {action_id} on {message_ts}")
+
         elif action_id.startswith("feedback_helpful_"):
             # Handle positive feedback
             # Update the message to acknowledge feedback
-            blocks = original_message.get("blocks", [])
-            
-            # Remove the actions block
-            blocks = [block for block in blocks if block.get("type") != "actions"]
-            
-            # Add feedback acknowledgment
-            blocks.append({
-                "type": "context",
-                "elements": [
-                    {
-                        "type": "mrkdwn",
-                        "text": "✅ *Feedback received:* Thanks for the positive feedback!"
-                    }
-                ]
-            })
-            
-            client.chat_update(
-                channel=channel_id,
-                ts=message_ts,
-                blocks=blocks
-            )
+            _acknowledge_feedback(respond, channel_id, message_ts, original_blocks, [FEEDBACK_HELPFUL_BLOCK])
             
             # Here you could log the positive feedback for future model improvements
             
         elif action_id.startswith("feedback_not_helpful_"):
             # Handle negative feedback
-            # Update the message to acknowledge feedback
-            blocks = original_message.get("blocks", [])
-            
-            # Remove the actions block
-            blocks = [block for block in blocks if block.get("type") != "actions"]
-            
-            # Add feedback acknowledgment and follow-up options
-            blocks.append({
-                "type": "context",
-                "elements": [
-                    {
-                        "type": "mrkdwn",
-                        "text": "📝 *Feedback received:* Thanks for letting us know this response wasn't helpful."
-                    }
-                ]
-            })
-            
-            # Add follow-up actions
-            blocks.append({
-                "type": "actions",
-                "elements": [
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "🔄 Try Again", "emoji": True},
-                        "action_id": f"regenerate_{uuid.uuid4()}",
-                        "style": "primary"
-                    }
-                ]
-            })
-            
-            client.chat_update(
-                channel=channel_id,
-                ts=message_ts,
-                blocks=blocks
+            # Update the message to acknowledge feedback and offer to try again
+            _acknowledge_feedback(
+                respond,
+                channel_id,
+                message_ts,
+                original_blocks,
+                [FEEDBACK_NOT_HELPFUL_BLOCK, make_try_again_block(action_base(action_id))],
             )
             
             # Here you could log the negative feedback for future model improvements
@@ -196,4 +257,4 @@ def handle_button_click(ack: Ack, body: dict, client: WebClient, context: BoltCo
                 text=f"Error processing your action: {e}"
             )
         except:
-            pass
\ No newline at end of file
+            pass
@@ -1,38 +1,66 @@
+import importlib
+import logging
+import os
 from slack_bolt import App
-from .ask_command import ask_callback
-from .localai_settings import localai_settings_callback, handle_localai_settings_submission
-from .preferences import preferences_callback, handle_preferences_submission
-from .thread_chat import thread_chat_callback
-from .summarize_command import summarize_callback
-from .image_command import image_callback
-from .list_instances import register_list_instances_command
 
-from .review_pr_command import register as register_review_pr_command
-from .agent_commands import register as register_agent_commands
-from .parsing_status_command import register as register_parsing_status_command
+logger = logging.getLogger(__name__)
+
+"""
+Slash commands are imported and registered lazily, so a deployment only pays the import cost
+of the commands it enables. Set `BOLTY_COMMANDS` to a comma-separated list of the names below
+to enable a subset; all commands are enabled by default.
+Each entry maps a name to (module, attribute, slash command). When the slash command is None,
+the attribute is a `register(app)` function that registers the command itself.
+"""
+
+COMMANDS = {
+    "ask": (".ask_command", "ask_callback", "/ask-bolty"),
+    "localai": (".localai_settings", "localai_settings_callback", "/localai-settings"),
+    "preferences": (".preferences", "preferences_callback", "/ai-preferences"),
+    "chat": (".thread_chat", "thread_chat_callback", "/chat"),
+    "summarize": (".summarize_command", "summarize_callback", "/summarize"),
+    "image": (".image_command", "image_callback", "/image"),
+    "list-instances": (".list_instances", "register_list_instances_command", None),
+    "review-pr": (".review_pr_command", "register", None),
+    "agent": (".agent_commands", "register", None),
+    "parsing-status": (".parsing_status_command", "register", None),
+}
+
+# View submissions that belong to a command, as (module, attribute, callback_id)
+VIEWS = {
+    "localai": (".localai_settings", "handle_localai_settings_submission", "localai_settings_modal"),
+    "preferences": (".preferences", "handle_preferences_submission", "ai_preferences_modal"),
+}
+
+
+def _enabled_commands():
+    names = os.environ.get("BOLTY_COMMANDS", "").strip()
+    if not names:
+        return list(COMMANDS)
+
+    enabled = []
+    for name in names.split(","):
+        name = name.strip().lower()
+        if name in COMMANDS:
+            enabled.append(name)
+        elif name:
+            logger.warning(f"Ignoring unknown command in BOLTY_COMMANDS: {name}")
+    return enabled
+
+
+def _load(module_name: str, attribute: str):
+    return getattr(importlib.import_module(module_name, __package__), attribute)
 
 
 def register(app: App):
-    # Register commands
-    app.command("/ask-bolty")(ask_callback)
-    app.command("/localai-settings")(localai_settings_callback)
-    app.command("/ai-preferences")(preferences_callback)
-    app.command("/chat")(thread_chat_callback)
-    app.command("/summarize")(summarize_callback)
-    app.command("/image")(image_callback)
-    
-    # Register the list-instances command
-    register_list_instances_command(app)
-    
-    # Register the review-pr command
-    register_review_pr_command(app)
-    
-    # Register agent commands
-    register_agent_commands(app)
-    
-    # Register parsing status command
-    register_parsing_status_command(app)
-    
-    # Register view submissions
-    app.view("localai_settings_modal")(handle_localai_settings_submission)
-    app.view("ai_preferences_modal")(handle_preferences_submission)
+    for name in _enabled_commands():
+        module_name, attribute, command = COMMANDS[name]
+        if command:
+            app.command(command)(_load(module_name, attribute))
+        else:
+            _load(module_name, attribute)(app)
+
+        # Register view submissions
+        if name in VIEWS:
+            module_name, attribute, callback_id = VIEWS[name]
+            app.view(callback_id)(_load(module_name, attribute))
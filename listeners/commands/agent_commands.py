@@ -2,12 +2,34 @@
 Commands for interacting with agents.
 """
 import logging
-import os
 from slack_bolt import App
 from agents.agent_registry import AgentRegistry
 
 logger = logging.getLogger(__name__)
 
+def _use_agent(respond, command, agent_name: str):
+    try:
+        # Set the active agent for this user only
+        AgentRegistry.set_active_agent(command["user_id"], agent_name)
+        respond(f"Active agent set to *{agent_name}*")
+    except ValueError as e:
+        respond(f"Error: {str(e)}")
+
+
+def _agent_info(respond, command, agent_name: str):
+    try:
+        respond(f"*{agent_name}*: {AgentRegistry.get_description(agent_name)}")
+    except ValueError as e:
+        respond(f"Error: {str(e)}")
+
+
+# Subcommands that take an agent name, mapped to their handler
+SUBCOMMANDS = {
+    "use": _use_agent,
+    "info": _agent_info,
+}
+
+
 def register(app: App):
     """
     Register agent commands with the Slack app.
@@ -32,63 +54,39 @@ def register(app: App):
         
         if not text:
             # Show available agents
-            available_agents = AgentRegistry.get_available_agents()
-            if not available_agents:
+            help_text = AgentRegistry.get_help_text()
+            if not help_text:
                 respond("No agents are currently available.")
                 return
-                
-            response = "*Available Agents:*\n"
-            for agent_name in available_agents:
-                agent_class = AgentRegistry.get_agent(agent_name)
-                response += f"• *{agent_name}*: {agent_class.get_description()}\n"
-                
-            respond(response)
+
+            respond(help_text)
             return
             
         # Check if the first word is a command
-        parts = text.split(maxsplit=1)
-        subcommand = parts[0].lower()
+        subcommand, _, agent_name = text.partition(" ")
+        subcommand = subcommand.lower()
+        handler = SUBCOMMANDS.get(subcommand)
         
-        if subcommand == "use":
-            if len(parts) < 2:
-                respond("Please specify an agent name. Example: `/agent use codegen`")
-                return
-                
-            agent_name = parts[1].lower()
-            try:
-                # Check if the agent exists
-                AgentRegistry.get_agent(agent_name)
-                
-                # Set the active agent
-                os.environ["ACTIVE_AGENT"] = agent_name
-                respond(f"Active agent set to *{agent_name}*")
-            except ValueError as e:
-                respond(f"Error: {str(e)}")
-        elif subcommand == "info":
-            if len(parts) < 2:
-                respond("Please specify an agent name. Example: `/agent info codegen`")
+        if handler:
+            agent_name = agent_name.strip().lower()
+            if not agent_name:
+                respond(f"Please specify an agent name. Example: `/agent {subcommand} codegen`")
                 return
-                
-            agent_name = parts[1].lower()
-            try:
-                agent_class = AgentRegistry.get_agent(agent_name)
-                respond(f"*{agent_name}*: {agent_class.get_description()}")
-            except ValueError as e:
-                respond(f"Error: {str(e)}")
+
+            handler(respond, command, agent_name)
         else:
             # Process the message with the active agent
-            active_agent_name = os.environ.get("ACTIVE_AGENT")
+            active_agent_name = AgentRegistry.get_active_agent(command["user_id"])
             if not active_agent_name:
                 respond("No active agent set. Use `/agent use <agent_name>` to set an active agent.")
                 return
                 
             try:
-                agent_class = AgentRegistry.get_agent(active_agent_name)
-                agent = agent_class()
+                agent = AgentRegistry.get_agent_instance(active_agent_name)
                 
                 # Process the message
                 response = agent.process_message(text)
                 respond(response)
             except Exception as e:
                 logger.error(f"Error processing message with agent: {e}")
-                respond(f"Error processing message with agent: {str(e)}")
\ No newline at end of file
+                respond(f"Error processing message with agent: {str(e)}")
@@ -1,11 +1,15 @@
-from slack_bolt import Ack, Say, BoltContext
+import json
+from slack_bolt import Ack, Say, Respond, BoltContext
 from logging import Logger
 from ai.providers import get_provider_response
-from ai.streaming import stream_response
 from slack_sdk import WebClient
-from state_store.conversation_memory import add_to_conversation_history, get_conversation_history
+from state_store.async_writer import enqueue_history_add
+from state_store.get_user_state import get_user_state
+from state_store.response_cache import get_cached, make_key, set_cached
 from state_store.user_preferences import get_user_preferences, get_system_prompt
-import uuid
+from state_store.vector_memory import recall_memories
+from ..listener_utils.background import run_in_background
+from ..listener_utils.message_blocks import make_response_blocks
 
 """
 Callback for handling the 'ask-bolty' command. It acknowledges the command, retrieves the user's ID and prompt,
@@ -13,7 +17,7 @@ checks if the prompt is empty, and responds with either an error message or the
 """
 
 
-def ask_callback(client: WebClient, ack: Ack, command, say: Say, logger: Logger, context: BoltContext):
+def ask_callback(client: WebClient, ack: Ack, command, say: Say, respond: Respond, logger: Logger, context: BoltContext):
     try:
         ack()
         user_id = context["user_id"]
@@ -21,97 +25,69 @@ def ask_callback(client: WebClient, ack: Ack, command, say: Say, logger: Logger,
         prompt = command["text"]
 
         if prompt == "":
-            client.chat_postEphemeral(
-                channel=channel_id, user=user_id, text="Looks like you didn't provide a prompt. Try again."
-            )
+            respond(text="Looks like you didn't provide a prompt. Try again.", response_type="ephemeral")
             return
             
         # Get user preferences
         preferences = get_user_preferences(user_id)
+        memory_enabled = preferences["memory_enabled"]
         
-        # Get conversation history if memory is enabled
+        # Recall the past messages relevant to this prompt if memory is enabled
         conversation_context = []
-        if preferences["memory_enabled"]:
-            conversation_context = get_conversation_history(user_id, channel_id)
+        if memory_enabled:
+            conversation_context = recall_memories(user_id, channel_id, query=prompt, k=5)
             # Add current message to history
-            add_to_conversation_history(user_id, prompt, True, channel_id)
+            enqueue_history_add(user_id, prompt, True, channel_id)
         
         # Get system prompt based on user preferences
-        system_content = get_system_prompt(user_id)
+        system_content = get_system_prompt(user_id, preferences)
         
-        # Post "thinking" message
-        response = client.chat_postEphemeral(
-            channel=channel_id,
-            user=user_id,
-            text="⏳ Thinking..."
-        )
+        # Post "thinking" message through the command's response_url, which the final answer replaces
+        respond(text="⏳ Thinking...", response_type="ephemeral")
         
-        # Generate response
-        try:
-            from state_store.get_user_state import get_user_state
-            provider_name, model_name = get_user_state(user_id, False)
-            
-            # Use streaming response if not in ephemeral message
-            ai_response = get_provider_response(user_id, prompt, conversation_context, system_content)
-            
-            # Update the message with the response and add interactive buttons
-            client.chat_update(
-                channel=channel_id,
-                ts=response["ts"],
-                blocks=[
-                    {
-                        "type": "rich_text",
-                        "elements": [
-                            {
-                                "type": "rich_text_quote",
-                                "elements": [{"type": "text", "text": prompt}],
-                            },
-                            {
-                                "type": "rich_text_section",
-                                "elements": [{"type": "text", "text": ai_response}],
-                            },
-                        ],
-                    },
-                    {
-                        "type": "actions",
-                        "elements": [
-                            {
-                                "type": "button",
-                                "text": {"type": "plain_text", "text": "🔄 Regenerate", "emoji": True},
-                                "action_id": f"regenerate_{uuid.uuid4()}",
-                                "style": "primary"
-                            },
-                            {
-                                "type": "button",
-                                "text": {"type": "plain_text", "text": "👍 Helpful", "emoji": True},
-                                "action_id": f"feedback_helpful_{uuid.uuid4()}"
-                            },
-                            {
-                                "type": "button",
-                                "text": {"type": "plain_text", "text": "👎 Not Helpful", "emoji": True},
-                                "action_id": f"feedback_not_helpful_{uuid.uuid4()}"
-                            }
-                        ]
-                    }
-                ]
-            )
-            
-            # Add AI response to conversation history if memory is enabled
-            if preferences["memory_enabled"]:
-                add_to_conversation_history(user_id, ai_response, False, channel_id)
-                
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            client.chat_update(
-                channel=channel_id,
-                ts=response["ts"],
-                text=f"Error generating response: {e}"
-            )
+        # Generate off the listener thread so the Bolt worker is free for the next event
+        run_in_background(
+            _generate_response, respond, logger, user_id, channel_id, prompt,
+            memory_enabled, conversation_context, system_content,
+        )
             
     except Exception as e:
         logger.error(e)
-        client.chat_postEphemeral(
-            channel=channel_id, 
-            user=user_id, 
-            text=f"Received an error from Bolty: {e}"
+        respond(text=f"Received an error from Bolty: {e}", response_type="ephemeral")
+
+
+def _generate_response(
+    respond: Respond,
+    logger: Logger,
+    user_id: str,
+    channel_id: str,
+    prompt: str,
+    memory_enabled: bool,
+    conversation_context: list,
+    system_content: str,
+):
+    # Generate response
+    try:
+        provider_name, model_name = get_user_state(user_id, False)
+        
+        # Identical requests are answered from the response cache without calling the provider
+        cache_key = make_key(provider_name, model_name, system_content, prompt, json.dumps(conversation_context))
+        ai_response = get_cached(cache_key)
+        if ai_response is None:
+            ai_response = get_provider_response(user_id, prompt, conversation_context, system_content)
+            set_cached(cache_key, ai_response)
+        
+        # Replace the "thinking" message with the response and add interactive buttons
+        respond(
+            text=ai_response,
+            blocks=make_response_blocks(prompt, ai_response),
+            replace_original=True,
         )
+        
+        # Add AI response to conversation history if memory is enabled
+        if memory_enabled:
+            enqueue_history_add(user_id, ai_response, False, channel_id)
+            
+    except Exception as e:
+        logger.error(f"Error generating response: {e}")
+        respond(text=f"Error generating response: {e}", replace_original=True)
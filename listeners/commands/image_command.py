@@ -1,72 +1,95 @@
-from slack_bolt import Ack, Say, BoltContext
+import threading
+import time
+from slack_bolt import Ack, Say, Respond, BoltContext
 from logging import Logger
 from slack_sdk import WebClient
 from ai.providers.image_generation import generate_image
+from ..listener_utils.background import run_in_background
+from ..listener_utils.message_blocks import MAX_ALT_TEXT, clip_text
 
-def image_callback(client: WebClient, ack: Ack, command, say: Say, logger: Logger, context: BoltContext):
+# Seconds between "still generating" updates while the image provider works
+HEARTBEAT_INTERVAL = 3
+# A response_url accepts at most 5 responses; the placeholder and the final image take two of them
+MAX_HEARTBEATS = 3
+
+def image_callback(client: WebClient, ack: Ack, command, say: Say, respond: Respond, logger: Logger, context: BoltContext):
     """
     Callback for handling the 'image' command. It generates an image based on the provided prompt
     using the DALL-E model and posts it to the channel.
     """
     try:
         ack()
-        user_id = context["user_id"]
-        channel_id = context["channel_id"]
         prompt = command["text"]
 
         if prompt == "":
-            client.chat_postEphemeral(
-                channel=channel_id, user=user_id, text="Please provide a prompt for the image generation."
-            )
+            respond(text="Please provide a prompt for the image generation.", response_type="ephemeral")
             return
             
-        # Post "thinking" message
-        response = client.chat_postEphemeral(
-            channel=channel_id,
-            user=user_id,
-            text="🎨 Generating image..."
-        )
+        # Post "thinking" message through the command's response_url, which the image replaces
+        respond(text="🎨 Generating image...", response_type="ephemeral")
         
-        # Generate image
+        # Generate off the listener thread so the Bolt worker is free for the next event
+        run_in_background(_generate_image, respond, logger, prompt)
+            
+    except Exception as e:
+        logger.error(e)
+        respond(text=f"Received an error while generating image: {e}", response_type="ephemeral")
+
+
+def _heartbeat(respond: Respond, logger: Logger, stop: threading.Event):
+    started = time.monotonic()
+    for _ in range(MAX_HEARTBEATS):
+        if stop.wait(HEARTBEAT_INTERVAL):
+            return
+        elapsed = int(time.monotonic() - started)
+        try:
+            respond(text=f"🎨 Generating image... ({elapsed}s)", replace_original=True)
+        except Exception as e:
+            logger.error(f"Error updating image progress: {e}")
+            return
+
+
+def _generate_image(respond: Respond, logger: Logger, prompt: str):
+    # Generate image, updating the placeholder with the elapsed time so the user can see progress
+    try:
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat, args=(respond, logger, stop_heartbeat), daemon=True
+        )
+        heartbeat.start()
         try:
             image_url = generate_image(prompt)
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        
+        if not image_url:
+            respond(
+                text="Sorry, I couldn't generate an image. Please try again with a different prompt.",
+                replace_original=True,
+            )
+            return
             
-            if not image_url:
-                client.chat_update(
-                    channel=channel_id,
-                    ts=response["ts"],
-                    text="Sorry, I couldn't generate an image. Please try again with a different prompt."
-                )
-                return
-                
-            # Post the image to the channel
-            client.chat_update(
-                channel=channel_id,
-                ts=response["ts"],
-                blocks=[
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": f"*Image prompt:* {prompt}"
-                        }
-                    },
-                    {
-                        "type": "image",
-                        "image_url": image_url,
-                        "alt_text": prompt
+        # Post the image to the channel
+        respond(
+            text=f"Image prompt: {prompt}",
+            replace_original=True,
+            blocks=[
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": clip_text(f"*Image prompt:* {prompt}")
                     }
-                ]
-            )
-                
-        except Exception as e:
-            logger.error(f"Error generating image: {e}")
-            client.chat_update(
-                channel=channel_id,
-                ts=response["ts"],
-                text=f"Error generating image: {e}"
-            )
+                },
+                {
+                    "type": "image",
+                    "image_url": image_url,
+                    "alt_text": clip_text(prompt, MAX_ALT_TEXT)
+                }
+            ]
+        )
             
     except Exception as e:
-        logger.error(e)
-        client.chat_postEphemeral(channel=channel_id, user=user_id, text=f"Received an error while generating image: {e}")
\ No newline at end of file
+        logger.error(f"Error generating image: {e}")
+        respond(text=f"Error generating image: {e}", replace_original=True)
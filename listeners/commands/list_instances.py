@@ -4,6 +4,58 @@ Command to list available AI instances.
 from slack_bolt import App
 from slack_sdk.models.blocks import SectionBlock, MarkdownTextObject, DividerBlock
 
+from ai.multi_instance_manager import manager
+from ..listener_utils.message_blocks import clip_text
+
+# Static header and divider, serialized once and shared by every rebuild
+_HEADER_BLOCKS = tuple(
+    block.to_dict()
+    for block in (
+        SectionBlock(text=MarkdownTextObject(text="*Available AI Instances*")),
+        DividerBlock(),
+    )
+)
+
+# (manager.topology_version, serialized blocks); rebuilt only when a character is registered
+_blocks_cache = (None, None)
+
+
+def _instance_line(instance: dict) -> str:
+    status_emoji = "🟢" if instance["status"] == "active" else "⚪"
+    return f"{status_emoji} *{instance['name']}*\n{instance['description']}"
+
+
+def _get_instances() -> list:
+    return [
+        {"name": "Default AI", "status": "active", "description": "Default AI provider"},
+        *(
+            {"name": name, "status": "available", "description": "OpenAI character"}
+            for name in manager.get_available_openai_characters()
+        ),
+        *(
+            {"name": name, "status": "available", "description": "Anthropic character"}
+            for name in manager.get_available_anthropic_characters()
+        ),
+        {"name": "Codegen", "status": "available", "description": "Code analysis and generation agent"},
+    ]
+
+
+def _get_blocks() -> list:
+    global _blocks_cache
+    version, blocks = _blocks_cache
+    if version == manager.topology_version:
+        return blocks
+
+    version = manager.topology_version
+    # All instances go into one section to keep the payload small and well under the 50-block limit
+    instances_text = "\n\n".join(_instance_line(instance) for instance in _get_instances())
+    blocks = [
+        *_HEADER_BLOCKS,
+        SectionBlock(text=MarkdownTextObject(text=clip_text(instances_text))).to_dict(),
+    ]
+    _blocks_cache = (version, blocks)
+    return blocks
+
 
 def register_list_instances_command(app: App):
     """
@@ -24,27 +76,4 @@ def register_list_instances_command(app: App):
         """
         ack()
         
-        # This is a placeholder. In a real implementation, you would get the instances from a manager
-        instances = [
-            {"name": "Default AI", "status": "active", "description": "Default AI provider"},
-            {"name": "Codegen", "status": "available", "description": "Code analysis and generation agent"}
-        ]
-        
-        blocks = [
-            SectionBlock(
-                text=MarkdownTextObject(text="*Available AI Instances*")
-            ),
-            DividerBlock()
-        ]
-        
-        for instance in instances:
-            status_emoji = "🟢" if instance["status"] == "active" else "⚪"
-            blocks.append(
-                SectionBlock(
-                    text=MarkdownTextObject(
-                        text=f"{status_emoji} *{instance['name']}*\n{instance['description']}"
-                    )
-                )
-            )
-        
-        respond(blocks=blocks)
\ No newline at end of file
+        respond(blocks=_get_blocks())
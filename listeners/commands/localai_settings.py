@@ -1,7 +1,7 @@
 import os
 import logging
-from slack_sdk import WebClient
-from slack_bolt import Ack, BoltContext
+
+from settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -12,10 +12,11 @@ def localai_settings_callback(ack, command, client, context):
     """
     ack()
     
-    # Get current settings from environment variables
-    current_api_key = os.environ.get("LOCALAI_API_KEY", "")
-    current_api_url = os.environ.get("LOCALAI_API_URL", "https://api.deepinfra.com/v1/openai")
-    current_custom_models = os.environ.get("LOCALAI_CUSTOM_MODELS", "")
+    # Get current settings from the environment snapshot
+    settings = get_settings()
+    current_api_key = settings.localai_api_key
+    current_api_url = settings.localai_api_url
+    current_custom_models = settings.localai_custom_models
     
     # Mask API key for display
     masked_api_key = "••••••••" if current_api_key else ""
@@ -101,18 +102,20 @@ def handle_localai_settings_submission(ack, view, client, body):
     
     try:
         # Extract values from the view
-        api_key = view["state"]["values"]["api_key_block"]["api_key_input"]["value"]
-        api_url = view["state"]["values"]["api_url_block"]["api_url_input"]["value"]
-        custom_models = view["state"]["values"]["custom_models_block"]["custom_models_input"]["value"]
+        values = view["state"]["values"]
+        api_key = values["api_key_block"]["api_key_input"]["value"]
+        api_url = values["api_url_block"]["api_url_input"]["value"]
+        custom_models = values["custom_models_block"]["custom_models_input"]["value"]
         
         # Don't update API key if it's masked (user didn't change it)
         if api_key == "••••••••":
-            api_key = os.environ.get("LOCALAI_API_KEY", "")
+            api_key = get_settings().localai_api_key
         
         # Update environment variables
         os.environ["LOCALAI_API_KEY"] = api_key
         os.environ["LOCALAI_API_URL"] = api_url
         os.environ["LOCALAI_CUSTOM_MODELS"] = custom_models
+        get_settings.cache_clear()
         
         # Send confirmation message
         client.chat_postEphemeral(
@@ -2,14 +2,23 @@
 Command to check the parsing status of the Codegen agent.
 """
 import logging
-import os
 from slack_bolt import App
-from slack_sdk.errors import SlackApiError
 
 from agents.agent_registry import AgentRegistry
 
 logger = logging.getLogger(__name__)
 
+# Response templates for each parsing status, formatted with the status dict
+STATUS_MESSAGES = {
+    "not_started": "Repository parsing has not started for `{repo}`.",
+    "in_progress": "Repository parsing is in progress for `{repo}`. Please wait...",
+    "completed": "Repository parsing completed successfully for `{repo}`.",
+    "failed": (
+        "Repository parsing failed for `{repo}` with error: {error}\n\n"
+        "You can ask the agent to 'retry parsing' to attempt again."
+    ),
+}
+
 def parsing_status_callback(ack, command, client, respond):
     """
     Handle the /parsing-status command.
@@ -24,32 +33,23 @@ def parsing_status_callback(ack, command, client, respond):
     ack()
     
     try:
-        # Get the active agent name from environment variables
-        active_agent = os.environ.get("ACTIVE_AGENT")
+        # Get the active agent for the requesting user
+        active_agent = AgentRegistry.get_active_agent(command["user_id"])
         
         if not active_agent or active_agent != "codegen":
             respond("No active Codegen agent found. Please select the Codegen agent when starting the application.")
             return
         
-        # Get the Codegen agent
-        agent_class = AgentRegistry.get_agent("codegen")
-        agent = agent_class()
+        # Get the shared Codegen agent instance, so status reflects the agent that is actually parsing
+        agent = AgentRegistry.get_agent_instance("codegen")
         
         # Get the parsing status
         status = agent.get_parsing_status()
         
         # Format the response based on the status
-        if status["status"] == "not_started":
-            response = f"Repository parsing has not started for `{status['repo']}`."
-        elif status["status"] == "in_progress":
-            response = f"Repository parsing is in progress for `{status['repo']}`. Please wait..."
-        elif status["status"] == "completed":
-            response = f"Repository parsing completed successfully for `{status['repo']}`."
-        elif status["status"] == "failed":
-            response = (
-                f"Repository parsing failed for `{status['repo']}` with error: {status['error']}\n\n"
-                f"You can ask the agent to 'retry parsing' to attempt again."
-            )
+        template = STATUS_MESSAGES.get(status["status"])
+        if template:
+            response = template.format(**status)
         else:
             response = f"Unknown parsing status: {status['status']}"
         
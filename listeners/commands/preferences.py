@@ -1,10 +1,90 @@
 import logging
-from slack_sdk import WebClient
-from slack_bolt import Ack, BoltContext
 from state_store.user_preferences import get_user_preferences, set_user_preferences
 
 logger = logging.getLogger(__name__)
 
+
+def _plain_text(text: str) -> dict:
+    return {"type": "plain_text", "text": text}
+
+
+def _option(text: str, value: str) -> dict:
+    return {"text": _plain_text(text), "value": value}
+
+
+# Static parts of the preferences modal, built once and shared by every modal open
+_LENGTH_OPTIONS = (_option("Short", "short"), _option("Medium", "medium"), _option("Long", "long"))
+_STYLE_OPTIONS = (_option("Precise", "precise"), _option("Balanced", "balanced"), _option("Creative", "creative"))
+_YES_NO_OPTIONS = (_option("Yes", "true"), _option("No", "false"))
+
+_INTRO_BLOCK = {
+    "type": "section",
+    "text": {
+        "type": "mrkdwn",
+        "text": "Configure your AI interaction preferences. These settings will personalize how the AI responds to you."
+    }
+}
+_DIVIDER_BLOCK = {"type": "divider"}
+_SYSTEM_PROMPT_INTRO_BLOCK = {
+    "type": "section",
+    "text": {
+        "type": "mrkdwn",
+        "text": (
+            "*Custom System Prompt*\nOptionally provide a custom system prompt to control how the AI responds. "
+            "Leave blank to use the default."
+        )
+    }
+}
+
+
+def _select_block(name: str, label: str, placeholder: str, options: tuple, initial_value: str) -> dict:
+    """
+    Build a static_select input block for the preferences modal.
+
+    Args:
+        name: Preference name; the block and action IDs are derived from it
+        label: Label shown above the select
+        placeholder: Placeholder text
+        options: The select's options
+        initial_value: Value of the option selected initially
+
+    Returns:
+        The input block
+    """
+    initial_option = next((option for option in options if option["value"] == initial_value), options[0])
+    return {
+        "type": "input",
+        "block_id": f"{name}_block",
+        "element": {
+            "type": "static_select",
+            "action_id": f"{name}_input",
+            "placeholder": _plain_text(placeholder),
+            "initial_option": initial_option,
+            "options": list(options)
+        },
+        "label": _plain_text(label)
+    }
+
+
+def _yes_no(value: bool) -> str:
+    return "true" if value else "false"
+
+
+# Modal inputs by kind; each input's block and action IDs are derived from its preference name
+_SELECT_FIELDS = ("response_length", "conversation_style")
+_YES_NO_FIELDS = ("memory_enabled", "summarize_long_conversations")
+_TEXT_FIELDS = ("system_prompt",)
+
+
+def _read_preferences(values: dict) -> dict:
+    inputs = {name: values[f"{name}_block"][f"{name}_input"] for name in (*_SELECT_FIELDS, *_YES_NO_FIELDS, *_TEXT_FIELDS)}
+    return {
+        **{name: inputs[name]["selected_option"]["value"] for name in _SELECT_FIELDS},
+        **{name: inputs[name]["selected_option"]["value"] == "true" for name in _YES_NO_FIELDS},
+        **{name: inputs[name]["value"] for name in _TEXT_FIELDS},
+    }
+
+
 def preferences_callback(ack, command, client, context):
     """
     Callback for the /ai-preferences command.
@@ -22,101 +102,29 @@ def preferences_callback(ack, command, client, context):
             view={
                 "type": "modal",
                 "callback_id": "ai_preferences_modal",
-                "title": {"type": "plain_text", "text": "AI Preferences"},
-                "submit": {"type": "plain_text", "text": "Save"},
-                "close": {"type": "plain_text", "text": "Cancel"},
+                "title": _plain_text("AI Preferences"),
+                "submit": _plain_text("Save"),
+                "close": _plain_text("Cancel"),
                 "blocks": [
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": "Configure your AI interaction preferences. These settings will personalize how the AI responds to you."
-                        }
-                    },
-                    {
-                        "type": "divider"
-                    },
-                    {
-                        "type": "input",
-                        "block_id": "response_length_block",
-                        "element": {
-                            "type": "static_select",
-                            "action_id": "response_length_input",
-                            "placeholder": {"type": "plain_text", "text": "Select response length"},
-                            "initial_option": {
-                                "text": {"type": "plain_text", "text": preferences["response_length"].capitalize()},
-                                "value": preferences["response_length"]
-                            },
-                            "options": [
-                                {"text": {"type": "plain_text", "text": "Short"}, "value": "short"},
-                                {"text": {"type": "plain_text", "text": "Medium"}, "value": "medium"},
-                                {"text": {"type": "plain_text", "text": "Long"}, "value": "long"}
-                            ]
-                        },
-                        "label": {"type": "plain_text", "text": "Response Length"}
-                    },
-                    {
-                        "type": "input",
-                        "block_id": "conversation_style_block",
-                        "element": {
-                            "type": "static_select",
-                            "action_id": "conversation_style_input",
-                            "placeholder": {"type": "plain_text", "text": "Select conversation style"},
-                            "initial_option": {
-                                "text": {"type": "plain_text", "text": preferences["conversation_style"].capitalize()},
-                                "value": preferences["conversation_style"]
-                            },
-                            "options": [
-                                {"text": {"type": "plain_text", "text": "Precise"}, "value": "precise"},
-                                {"text": {"type": "plain_text", "text": "Balanced"}, "value": "balanced"},
-                                {"text": {"type": "plain_text", "text": "Creative"}, "value": "creative"}
-                            ]
-                        },
-                        "label": {"type": "plain_text", "text": "Conversation Style"}
-                    },
-                    {
-                        "type": "input",
-                        "block_id": "memory_enabled_block",
-                        "element": {
-                            "type": "static_select",
-                            "action_id": "memory_enabled_input",
-                            "placeholder": {"type": "plain_text", "text": "Enable conversation memory?"},
-                            "initial_option": {
-                                "text": {"type": "plain_text", "text": "Yes" if preferences["memory_enabled"] else "No"},
-                                "value": "true" if preferences["memory_enabled"] else "false"
-                            },
-                            "options": [
-                                {"text": {"type": "plain_text", "text": "Yes"}, "value": "true"},
-                                {"text": {"type": "plain_text", "text": "No"}, "value": "false"}
-                            ]
-                        },
-                        "label": {"type": "plain_text", "text": "Conversation Memory"}
-                    },
-                    {
-                        "type": "input",
-                        "block_id": "summarize_long_conversations_block",
-                        "element": {
-                            "type": "static_select",
-                            "action_id": "summarize_long_conversations_input",
-                            "placeholder": {"type": "plain_text", "text": "Summarize long conversations?"},
-                            "initial_option": {
-                                "text": {"type": "plain_text", "text": "Yes" if preferences["summarize_long_conversations"] else "No"},
-                                "value": "true" if preferences["summarize_long_conversations"] else "false"
-                            },
-                            "options": [
-                                {"text": {"type": "plain_text", "text": "Yes"}, "value": "true"},
-                                {"text": {"type": "plain_text", "text": "No"}, "value": "false"}
-                            ]
-                        },
-                        "label": {"type": "plain_text", "text": "Summarize Long Conversations"}
-                    },
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": "*Custom System Prompt*\nOptionally provide a custom system prompt to control how the AI responds. Leave blank to use the default."
-                        }
-                    },
+                    _INTRO_BLOCK,
+                    _DIVIDER_BLOCK,
+                    _select_block(
+                        "response_length", "Response Length", "Select response length",
+                        _LENGTH_OPTIONS, preferences["response_length"],
+                    ),
+                    _select_block(
+                        "conversation_style", "Conversation Style", "Select conversation style",
+                        _STYLE_OPTIONS, preferences["conversation_style"],
+                    ),
+                    _select_block(
+                        "memory_enabled", "Conversation Memory", "Enable conversation memory?",
+                        _YES_NO_OPTIONS, _yes_no(preferences["memory_enabled"]),
+                    ),
+                    _select_block(
+                        "summarize_long_conversations", "Summarize Long Conversations", "Summarize long conversations?",
+                        _YES_NO_OPTIONS, _yes_no(preferences["summarize_long_conversations"]),
+                    ),
+                    _SYSTEM_PROMPT_INTRO_BLOCK,
                     {
                         "type": "input",
                         "block_id": "system_prompt_block",
@@ -125,10 +133,10 @@ def preferences_callback(ack, command, client, context):
                             "type": "plain_text_input",
                             "action_id": "system_prompt_input",
                             "multiline": True,
-                            "placeholder": {"type": "plain_text", "text": "E.g., You are a helpful assistant that specializes in..."},
+                            "placeholder": _plain_text("E.g., You are a helpful assistant that specializes in..."),
                             "initial_value": preferences.get("system_prompt", "")
                         },
-                        "label": {"type": "plain_text", "text": "Custom System Prompt"}
+                        "label": _plain_text("Custom System Prompt")
                     }
                 ]
             }
@@ -150,21 +158,9 @@ def handle_preferences_submission(ack, view, client, body):
     
     try:
         # Extract values from the view
-        response_length = view["state"]["values"]["response_length_block"]["response_length_input"]["selected_option"]["value"]
-        conversation_style = view["state"]["values"]["conversation_style_block"]["conversation_style_input"]["selected_option"]["value"]
-        memory_enabled = view["state"]["values"]["memory_enabled_block"]["memory_enabled_input"]["selected_option"]["value"] == "true"
-        summarize_long_conversations = view["state"]["values"]["summarize_long_conversations_block"]["summarize_long_conversations_input"]["selected_option"]["value"] == "true"
-        system_prompt = view["state"]["values"]["system_prompt_block"]["system_prompt_input"]["value"]
+        preferences = _read_preferences(view["state"]["values"])
         
         # Update user preferences
-        preferences = {
-            "response_length": response_length,
-            "conversation_style": conversation_style,
-            "memory_enabled": memory_enabled,
-            "summarize_long_conversations": summarize_long_conversations,
-            "system_prompt": system_prompt
-        }
-        
         set_user_preferences(body["user"]["id"], preferences)
         
         # Send confirmation message
@@ -6,8 +6,13 @@ import re
 from slack_bolt import App
 from slack_sdk.models.blocks import SectionBlock, MarkdownTextObject, DividerBlock
 
+from ..listener_utils.background import run_in_background
+
 logger = logging.getLogger(__name__)
 
+# Matches GitHub PR URLs like https://github.com/owner/repo/pull/123
+PR_URL_PATTERN = re.compile(r"https?://github\.com/([^/]+)/([^/]+)/pull/(\d+)")
+
 def register(app: App):
     """
     Register the review-pr command.
@@ -43,7 +48,20 @@ def register(app: App):
         # Acknowledge the request
         respond(f"I'll review PR #{pr_info['pr_number']} in the {pr_info['owner']}/{pr_info['repo']} repository. This may take a few minutes...")
         
-        # In a real implementation, you would trigger the PR review process here
+        # Review off the listener thread; the result is posted back through the command's response_url
+        run_in_background(_do_review, respond, pr_info)
+
+
+def _do_review(respond, pr_info: dict):
+    """
+    Review a pull request and post the result.
+    
+    Args:
+        respond: Respond function bound to the command's response_url
+        pr_info: PR information from extract_pr_info
+    """
+    try:
+        # In a real implementation, you would run the PR review process here
         # For now, we'll just respond with a placeholder message
         blocks = [
             SectionBlock(
@@ -56,6 +74,9 @@ def register(app: App):
         ]
         
         respond(blocks=blocks)
+    except Exception as e:
+        logger.error(f"Error reviewing PR: {e}")
+        respond(f"Error reviewing PR: {str(e)}")
 
 def extract_pr_info(url):
     """
@@ -67,9 +88,7 @@ def extract_pr_info(url):
     Returns:
         A dictionary with PR information, or None if the URL is invalid
     """
-    # Match GitHub PR URLs like https://github.com/owner/repo/pull/123
-    pattern = r"https?://github\.com/([^/]+)/([^/]+)/pull/(\d+)"
-    match = re.match(pattern, url)
+    match = PR_URL_PATTERN.match(url)
     
     if not match:
         return None
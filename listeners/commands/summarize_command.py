@@ -3,8 +3,77 @@ from logging import Logger
 from ai.providers import get_provider_response
 from slack_sdk import WebClient
 from state_store.user_preferences import get_user_preferences, get_system_prompt
+from concurrent.futures import ThreadPoolExecutor
+from ..listener_utils.message_blocks import make_summary_blocks
+from ..listener_utils.ordered_client import OrderedClient
 import time
 
+# Message subtypes left out of summaries
+SKIPPED_SUBTYPES = frozenset({"bot_message", "channel_join", "channel_leave"})
+
+# Parallel users.info lookups per summary
+USER_LOOKUP_WORKERS = 8
+
+# Rough cap on the conversation text sent for summarizing, estimated at 4 characters per token
+SUMMARY_TOKEN_BUDGET = 6000
+
+
+def _lookup_user(client: WebClient, user_id: str) -> dict:
+    try:
+        return client.users_info(user=user_id).get("user", {})
+    except Exception:
+        # If we can't get user info, just use the user ID
+        return {}
+
+
+def _lookup_users(client: WebClient, user_ids: set) -> dict:
+    """
+    Look up each author once, in parallel.
+
+    Args:
+        client: Slack client
+        user_ids: Unique user IDs to look up
+
+    Returns:
+        Dictionary mapping user ID to user info, empty for users that couldn't be looked up
+    """
+    if not user_ids:
+        return {}
+    user_ids = list(user_ids)
+    with ThreadPoolExecutor(max_workers=min(USER_LOOKUP_WORKERS, len(user_ids))) as executor:
+        return dict(zip(user_ids, executor.map(lambda uid: _lookup_user(client, uid), user_ids)))
+
+
+def _newest_within_budget(messages: list) -> list:
+    """
+    Keep the newest messages whose text fits in SUMMARY_TOKEN_BUDGET.
+
+    Args:
+        messages: Messages in chronological order
+
+    Returns:
+        The newest messages that fit, in chronological order; always at least the newest one
+    """
+    budget = SUMMARY_TOKEN_BUDGET * 4
+    kept = 0
+    for msg in reversed(messages):
+        budget -= len(msg.get("text", ""))
+        if budget < 0:
+            break
+        kept += 1
+    return messages[-max(kept, 1):]
+
+
+def _display_name(users: dict, msg: dict) -> str:
+    user_info = users.get(msg.get("user"), {})
+    return user_info.get("real_name") or user_info.get("name") or msg.get("user", "Unknown user")
+
+
+def _format_ts(ts: str) -> str:
+    # Convert Unix timestamp to readable format
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(float(ts))) if ts else ""
+
+
 def summarize_callback(client: WebClient, ack: Ack, command, say: Say, logger: Logger, context: BoltContext):
     """
     Callback for handling the 'summarize' command. It retrieves recent messages from a channel
@@ -12,6 +81,7 @@ def summarize_callback(client: WebClient, ack: Ack, command, say: Say, logger: L
     """
     try:
         ack()
+        client = OrderedClient(client)
         user_id = context["user_id"]
         channel_id = context["channel_id"]
         
@@ -50,32 +120,10 @@ def summarize_callback(client: WebClient, ack: Ack, command, say: Say, logger: L
                 )
                 return
                 
-            # Format messages for the AI
-            formatted_messages = []
-            for msg in reversed(messages):  # Reverse to get chronological order
-                # Skip bot messages and system messages
-                if msg.get("subtype") in ["bot_message", "channel_join", "channel_leave"]:
-                    continue
-                    
-                user_info = {}
-                try:
-                    if msg.get("user"):
-                        user_info = client.users_info(user=msg.get("user")).get("user", {})
-                except Exception:
-                    # If we can't get user info, just use the user ID
-                    pass
-                    
-                user_name = user_info.get("real_name") or user_info.get("name") or msg.get("user", "Unknown user")
-                timestamp = msg.get("ts", "")
-                if timestamp:
-                    # Convert Unix timestamp to readable format
-                    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(float(timestamp)))
-                
-                text = msg.get("text", "")
-                
-                formatted_messages.append(f"{user_name} ({timestamp}): {text}")
+            # Skip bot messages and system messages, reversing to get chronological order
+            messages = [msg for msg in reversed(messages) if msg.get("subtype") not in SKIPPED_SUBTYPES]
             
-            if not formatted_messages:
+            if not messages:
                 client.chat_update(
                     channel=channel_id,
                     ts=response["ts"],
@@ -83,11 +131,23 @@ def summarize_callback(client: WebClient, ack: Ack, command, say: Say, logger: L
                 )
                 return
                 
+            # Long, chatty channels are cut to what fits the prompt budget, newest first
+            messages = _newest_within_budget(messages)
+            
+            # Look up every author once instead of once per message
+            users = _lookup_users(client, {msg["user"] for msg in messages if msg.get("user")})
+            
+            # Format messages for the AI
+            formatted_messages = [
+                f"{_display_name(users, msg)} ({_format_ts(msg.get('ts', ''))}): {msg.get('text', '')}"
+                for msg in messages
+            ]
+                
             # Get user preferences
             preferences = get_user_preferences(user_id)
             
             # Get system prompt based on user preferences
-            system_content = get_system_prompt(user_id)
+            system_content = get_system_prompt(user_id, preferences)
             
             # Create a special system prompt for summarization
             summary_system_prompt = f"{system_content}\n\nYou are tasked with summarizing a Slack conversation. Please provide a concise summary that captures the main points, decisions, and action items from the conversation. Format your response with clear sections and bullet points where appropriate."
@@ -103,27 +163,7 @@ def summarize_callback(client: WebClient, ack: Ack, command, say: Say, logger: L
             client.chat_update(
                 channel=channel_id,
                 ts=response["ts"],
-                blocks=[
-                    {
-                        "type": "header",
-                        "text": {
-                            "type": "plain_text",
-                            "text": f"📝 Summary of last {len(formatted_messages)} messages"
-                        }
-                    },
-                    {
-                        "type": "divider"
-                    },
-                    {
-                        "type": "rich_text",
-                        "elements": [
-                            {
-                                "type": "rich_text_section",
-                                "elements": [{"type": "text", "text": ai_response}],
-                            }
-                        ],
-                    }
-                ],
+                blocks=make_summary_blocks(f"📝 Summary of last {len(formatted_messages)} messages", ai_response),
             )
                 
         except Exception as e:
@@ -1,15 +1,38 @@
 import logging
+import threading
 from logging import Logger
+from cachetools import TTLCache
 from slack_bolt import Ack, Say, BoltContext
 from slack_sdk import WebClient
 from ai.providers import get_provider_response
 from ai.streaming import stream_response
-from state_store.conversation_memory import get_conversation_history, add_to_conversation_history, summarize_conversation
+from state_store.conversation_memory import (
+    get_conversation_history,
+    get_rolling_summary,
+    heuristic_summary,
+    update_rolling_summary,
+    SUMMARY_KEEP_RECENT,
+)
 from state_store.user_preferences import get_user_preferences, get_system_prompt
+from state_store.async_writer import enqueue_history_add
 from state_store.get_user_state import get_user_state
+from ..listener_utils.background import run_in_background
+from ..listener_utils.ordered_client import OrderedClient
 
 logger = logging.getLogger(__name__)
 
+# Whether a thread was started by the bot, keyed by (channel_id, thread_ts); a thread never changes owner,
+# so replies after the first skip the conversations.history lookup
+BOT_THREAD_CACHE_TTL = 3600
+_bot_thread_cache = TTLCache(maxsize=4096, ttl=BOT_THREAD_CACHE_TTL)
+_bot_thread_lock = threading.Lock()
+
+
+def _remember_bot_thread(channel_id: str, thread_ts: str, is_bot_thread: bool):
+    with _bot_thread_lock:
+        _bot_thread_cache[(channel_id, thread_ts)] = is_bot_thread
+
+
 def thread_chat_callback(client: WebClient, ack: Ack, command, say: Say, logger: Logger, context: BoltContext):
     """
     Callback for handling the 'chat' command.
@@ -17,6 +40,7 @@ def thread_chat_callback(client: WebClient, ack: Ack, command, say: Say, logger:
     """
     try:
         ack()
+        client = OrderedClient(client)
         user_id = context["user_id"]
         channel_id = context["channel_id"]
         prompt = command["text"]
@@ -29,26 +53,28 @@ def thread_chat_callback(client: WebClient, ack: Ack, command, say: Say, logger:
             )
             return
             
-        # Post initial message to create a thread
-        response = client.chat_postMessage(
+        # Post initial message to create a thread, loading the user's settings while it's in flight
+        pending_post = run_in_background(
+            client.chat_postMessage,
             channel=channel_id,
             text=f"*Thread chat with AI*\n\n> {prompt}"
         )
         
-        thread_ts = response["ts"]
-        
         # Get user preferences
         preferences = get_user_preferences(user_id)
         
-        # Add user message to conversation history if memory is enabled
-        if preferences["memory_enabled"]:
-            add_to_conversation_history(user_id, prompt, True, channel_id, thread_ts)
-        
         # Get provider and model
         provider_name, model_name = get_user_state(user_id, False)
         
         # Get system prompt based on user preferences
-        system_content = get_system_prompt(user_id)
+        system_content = get_system_prompt(user_id, preferences)
+        
+        thread_ts = pending_post.result()["ts"]
+        _remember_bot_thread(channel_id, thread_ts, True)
+        
+        # Add user message to conversation history if memory is enabled
+        if preferences["memory_enabled"]:
+            enqueue_history_add(user_id, prompt, True, channel_id, thread_ts)
         
         # Generate response (streaming if possible)
         try:
@@ -75,7 +101,7 @@ def thread_chat_callback(client: WebClient, ack: Ack, command, say: Say, logger:
             
             # Add AI response to conversation history if memory is enabled
             if preferences["memory_enabled"]:
-                add_to_conversation_history(user_id, ai_response, False, channel_id, thread_ts)
+                enqueue_history_add(user_id, ai_response, False, channel_id, thread_ts)
                 
     except Exception as e:
         logger.error(e)
@@ -90,6 +116,7 @@ def handle_thread_message(client: WebClient, event, logger: Logger, context: Bol
     Handle messages posted in threads that were started by the chat command.
     """
     try:
+        client = OrderedClient(client)
         # Check if this is a thread and if the bot is mentioned
         if "thread_ts" not in event or "bot_id" in event:
             return
@@ -100,38 +127,52 @@ def handle_thread_message(client: WebClient, event, logger: Logger, context: Bol
         thread_ts = event["thread_ts"]
         message_text = event["text"]
         
-        # Check if this is a thread started by the bot
-        thread_parent = client.conversations_history(
-            channel=channel_id,
-            latest=thread_ts,
-            limit=1,
-            inclusive=True
-        )
-        
-        if not thread_parent["messages"] or "bot_id" not in thread_parent["messages"][0]:
+        # Check if this is a thread started by the bot, loading the user's preferences while the lookup is in flight
+        with _bot_thread_lock:
+            is_bot_thread = _bot_thread_cache.get((channel_id, thread_ts))
+        if is_bot_thread is False:
             return
-            
+        pending_parent = None
+        if is_bot_thread is None:
+            pending_parent = run_in_background(
+                client.conversations_history,
+                channel=channel_id,
+                latest=thread_ts,
+                limit=1,
+                inclusive=True
+            )
+        
         # Get user preferences
         preferences = get_user_preferences(user_id)
+        system_content = get_system_prompt(user_id, preferences)
+        
+        if pending_parent is not None:
+            thread_parent = pending_parent.result()
+            is_bot_thread = bool(thread_parent["messages"]) and "bot_id" in thread_parent["messages"][0]
+            _remember_bot_thread(channel_id, thread_ts, is_bot_thread)
+            if not is_bot_thread:
+                return
         
         # Get conversation history if memory is enabled
         conversation_context = []
         if preferences["memory_enabled"]:
             conversation_context = get_conversation_history(user_id, channel_id, thread_ts)
             # Add current message to history
-            add_to_conversation_history(user_id, message_text, True, channel_id, thread_ts)
+            enqueue_history_add(user_id, message_text, True, channel_id, thread_ts)
         
-        # Check if we should summarize a long conversation
+        # For long conversations, use the rolling summary of the older messages and fold in any
+        # messages that have aged out since, in the background so this reply isn't held up.
+        # Until the first rolling summary lands, a heuristic one stands in without an extra AI call
         summary = None
         if preferences["summarize_long_conversations"] and len(conversation_context) > 8:
-            summary = summarize_conversation(user_id, channel_id, thread_ts)
+            summary = get_rolling_summary(user_id, channel_id, thread_ts) or heuristic_summary(
+                conversation_context[:-SUMMARY_KEEP_RECENT]
+            )
+            run_in_background(update_rolling_summary, user_id, channel_id, thread_ts)
         
         # Get provider and model
         provider_name, model_name = get_user_state(user_id, False)
         
-        # Get system prompt based on user preferences
-        system_content = get_system_prompt(user_id)
-        
         # Add summary to system content if available
         if summary:
             system_content += f"\n\nHere is a summary of the conversation so far:\n{summary}\n\n"
@@ -161,7 +202,7 @@ def handle_thread_message(client: WebClient, event, logger: Logger, context: Bol
             
             # Add AI response to conversation history if memory is enabled
             if preferences["memory_enabled"]:
-                add_to_conversation_history(user_id, ai_response, False, channel_id, thread_ts)
+                enqueue_history_add(user_id, ai_response, False, channel_id, thread_ts)
                 
     except Exception as e:
         logger.error(f"Error handling thread message: {e}")
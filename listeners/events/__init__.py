@@ -5,20 +5,24 @@ from .app_messaged import app_messaged_callback
 from .file_shared import file_shared_callback
 from .voice_message import handle_voice_message
 from ..commands.thread_chat import handle_thread_message
+from ..listener_utils.listener_constants import AUDIO_EXTS
+
+
+def _message_router(client, event, context, logger, say):
+    """
+    Route each message event to exactly one handler: voice messages, replies in channel threads
+    (continuing /chat conversations), and everything else, which includes DMs and their threads.
+    """
+    if any(file.get("filetype") in AUDIO_EXTS for file in event.get("files", ())):
+        handle_voice_message(client, event, context, logger)
+    elif event.get("thread_ts") and event.get("channel_type") != "im":
+        handle_thread_message(client, event, logger, context)
+    else:
+        app_messaged_callback(client, event, logger, say)
 
 
 def register(app: App):
     app.event("app_home_opened")(app_home_opened_callback)
     app.event("app_mention")(app_mentioned_callback)
-    app.event("message")(app_messaged_callback)
+    app.event("message")(_message_router)
     app.event("file_shared")(file_shared_callback)
-    
-    # Register voice message handler
-    app.event("message", middleware=[
-        lambda body, context, next: "files" in body["event"] and 
-        any(file.get("filetype") in ["m4a", "mp3", "ogg", "wav"] for file in body["event"]["files"]) and 
-        next()
-    ])(handle_voice_message)
-    
-    # Register thread message handler for continuing conversations
-    app.event("message", middleware=[lambda body, context, next: "thread_ts" in body["event"] and next()])(handle_thread_message)
@@ -1,11 +1,12 @@
-from ai.providers import get_provider_response
+from ai.coalescing import get_coalesced_response
 from logging import Logger
 from slack_sdk import WebClient
-from slack_bolt import Say
+from ..listener_utils.background import agent_response, run_in_background, update_message_when_done
+from ..listener_utils.ordered_client import OrderedClient
 from ..listener_utils.listener_constants import DEFAULT_LOADING_TEXT, MENTION_WITHOUT_TEXT
 from ..listener_utils.parse_conversation import parse_conversation
+from ..listener_utils.thread_cache import get_thread_messages
 from agents.agent_registry import AgentRegistry
-import os
 
 """
 Handles the event when the app is mentioned in a Slack channel, retrieves the conversation context,
@@ -13,15 +14,16 @@ and generates an AI response if text is provided, otherwise sends a default resp
 """
 
 
-def app_mentioned_callback(client: WebClient, event: dict, logger: Logger, say: Say):
+def app_mentioned_callback(client: WebClient, event: dict, logger: Logger):
     try:
+        client = OrderedClient(client)
         channel_id = event.get("channel")
         thread_ts = event.get("thread_ts")
         user_id = event.get("user")
         text = event.get("text")
 
         if thread_ts:
-            conversation = client.conversations_replies(channel=channel_id, ts=thread_ts, limit=10)["messages"]
+            conversation = get_thread_messages(client, channel_id, thread_ts, limit=10)
         else:
             conversation = client.conversations_history(channel=channel_id, limit=10)["messages"]
             thread_ts = event["ts"]
@@ -29,25 +31,24 @@ def app_mentioned_callback(client: WebClient, event: dict, logger: Logger, say:
         conversation_context = parse_conversation(conversation[:-1])
 
         if text:
-            waiting_message = say(text=DEFAULT_LOADING_TEXT, thread_ts=thread_ts)
-            
             # Check if we should use an agent or the default AI provider
-            active_agent = os.environ.get("ACTIVE_AGENT")
+            active_agent = AgentRegistry.get_active_agent(user_id)
             
-            if active_agent and active_agent in AgentRegistry.get_available_agents():
+            # Start generating before posting the loading message so the two overlap
+            if active_agent:
                 # Use the active agent
                 logger.info(f"Using agent: {active_agent}")
-                agent_class = AgentRegistry.get_agent(active_agent)
-                agent = agent_class()
-                response = agent.process_message(text, conversation_context)
+                pending_response = run_in_background(agent_response, active_agent, text, conversation_context)
             else:
                 # Use the default AI provider
                 logger.info("Using default AI provider")
-                response = get_provider_response(user_id, text, conversation_context)
-                
-            client.chat_update(channel=channel_id, ts=waiting_message["ts"], text=response)
+                pending_response = run_in_background(get_coalesced_response, user_id, text, conversation_context)
+
+            # The loading message is replaced when the response is ready, without holding this listener thread
+            waiting_message = client.chat_postMessage(channel=channel_id, text=DEFAULT_LOADING_TEXT, thread_ts=thread_ts)
+            update_message_when_done(pending_response, client, channel_id, waiting_message["ts"])
         else:
-            waiting_message = say(text=DEFAULT_LOADING_TEXT, thread_ts=thread_ts)
+            waiting_message = client.chat_postMessage(channel=channel_id, text=DEFAULT_LOADING_TEXT, thread_ts=thread_ts)
             response = MENTION_WITHOUT_TEXT
             client.chat_update(channel=channel_id, ts=waiting_message["ts"], text=response)
 
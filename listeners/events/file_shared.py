@@ -1,10 +1,158 @@
+import codecs
 from slack_bolt import BoltContext
 from slack_sdk import WebClient
 from logging import Logger
 from ai.providers import get_provider_response
 from state_store.user_preferences import get_user_preferences, get_system_prompt
-from state_store.conversation_memory import add_to_conversation_history, get_conversation_history
-import re
+from state_store.conversation_memory import get_conversation_history
+from state_store.async_writer import enqueue_history_add
+from ai.http_pool import session
+from ..listener_utils.listener_constants import TEXT_EXTS
+from ..listener_utils.message_blocks import make_file_analysis_blocks
+from ..listener_utils.background import run_in_background
+from ..listener_utils.ordered_client import OrderedClient
+
+# Characters of a shared file passed to the AI; the download stops once this many have arrived
+MAX_FILE_CHARS = 15000
+DOWNLOAD_CHUNK_SIZE = 8192
+
+
+def _download_text(client: WebClient, url: str) -> str:
+    """
+    Download the start of a shared file as text, decoding as it arrives and stopping after MAX_FILE_CHARS.
+
+    Args:
+        client: Slack client, whose bot token authorizes the download
+        url: The file's private download URL
+
+    Returns:
+        The file content, truncated to MAX_FILE_CHARS
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts = []
+    length = 0
+    truncated = False
+    with session.get(url, headers={"Authorization": f"Bearer {client.token}"}, stream=True, timeout=15) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            part = decoder.decode(chunk)
+            parts.append(part)
+            length += len(part)
+            if length > MAX_FILE_CHARS:
+                # Leaving the block closes the connection without reading the rest of the file
+                truncated = True
+                break
+        else:
+            parts.append(decoder.decode(b"", final=True))
+
+    text = "".join(parts)
+    if truncated:
+        text = f"{text[:MAX_FILE_CHARS]}\n\n[Content truncated due to length...]"
+    return text
+
+
+def _is_text_file(file: dict) -> bool:
+    return file.get("filetype", "") in TEXT_EXTS or file.get("mimetype", "").startswith("text/")
+
+
+def _analyze_file(client: WebClient, file: dict, user_id: str, channel_id: str, logger: Logger):
+    """
+    Download a shared text file and reply with the AI's analysis of it.
+    """
+    file_type = file.get("filetype", "")
+    
+    # Get file content
+    file_content = ""
+    download_url = file.get("url_private_download") or file.get("url_private")
+    if download_url:
+        # Stream the file content, stopping once there is enough to analyze
+        try:
+            file_content = _download_text(client, download_url)
+        except Exception as e:
+            logger.error(f"Error downloading shared file: {e}")
+            # Try to get content from permalink
+            permalink = file.get("permalink")
+            if permalink:
+                client.chat_postEphemeral(
+                    channel=channel_id,
+                    user=user_id,
+                    text=(
+                        "I can't directly access the file content. You can copy and paste it to me, "
+                        "or use the /ask-bolty command with your question about the file."
+                    )
+                )
+                return
+    
+    if not file_content:
+        client.chat_postEphemeral(
+            channel=channel_id,
+            user=user_id,
+            text="I couldn't read the content of this file. Please try uploading it again or copy and paste the content."
+        )
+        return
+        
+    # Get user preferences
+    preferences = get_user_preferences(user_id)
+    
+    # Get conversation history if memory is enabled
+    conversation_context = []
+    if preferences["memory_enabled"]:
+        conversation_context = get_conversation_history(user_id, channel_id)
+        
+    # Get system prompt based on user preferences
+    system_content = get_system_prompt(user_id, preferences)
+    
+    # Add file context to the system prompt
+    file_system_prompt = (
+        f"{system_content}\n\nThe user has shared a {file_type} file with the following content:\n\n{file_content}\n\n"
+        "Please analyze this content and provide helpful insights or answer questions about it."
+    )
+    
+    # Post "thinking" message
+    response = client.chat_postEphemeral(
+        channel=channel_id,
+        user=user_id,
+        text="⏳ Analyzing your file..."
+    )
+    
+    # Generate response
+    try:
+        prompt = f"I've uploaded a {file_type} file. Please analyze it and provide insights."
+        
+        # Add the file content to conversation history
+        if preferences["memory_enabled"]:
+            enqueue_history_add(
+                user_id, 
+                (
+                    f"[Shared a file: {file.get('name', 'unnamed')}]\n\n"
+                    f"File content (may be truncated):\n{file_content[:500]}..."
+                ),
+                True, 
+                channel_id
+            )
+        
+        # Get AI response
+        ai_response = get_provider_response(user_id, prompt, conversation_context, file_system_prompt)
+        
+        # Update the message with the response
+        client.chat_update(
+            channel=channel_id,
+            ts=response["ts"],
+            blocks=make_file_analysis_blocks(file.get("name", "File"), ai_response),
+        )
+        
+        # Add AI response to conversation history if memory is enabled
+        if preferences["memory_enabled"]:
+            enqueue_history_add(user_id, ai_response, False, channel_id)
+            
+    except Exception as e:
+        logger.error(f"Error generating response for file: {e}")
+        client.chat_update(
+            channel=channel_id,
+            ts=response["ts"],
+            text=f"Error analyzing file: {e}"
+        )
+
 
 def file_shared_callback(client: WebClient, event, logger: Logger, context: BoltContext):
     """
@@ -12,17 +160,19 @@ def file_shared_callback(client: WebClient, event, logger: Logger, context: Bolt
     Currently supports text files for analysis.
     """
     try:
+        client = OrderedClient(client)
         # Get file info
         file_id = event.get("file_id")
         if not file_id:
             return
             
-        file_info = client.files_info(file=file_id)
-        file = file_info.get("file", {})
+        # When the event already says what type the file is, unsupported uploads are turned away without
+        # a files.info call; the full file info is only fetched for files we'll actually read
+        file = event.get("file") or {}
+        if "filetype" not in file or _is_text_file(file):
+            file = client.files_info(file=file_id).get("file", {})
         
-        # Check if this is a text file we can process
         file_type = file.get("filetype", "")
-        mime_type = file.get("mimetype", "")
         
         # Get user and channel info
         user_id = event.get("user_id") or context.get("user_id")
@@ -33,8 +183,7 @@ def file_shared_callback(client: WebClient, event, logger: Logger, context: Bolt
             return
             
         # Only process text files for now
-        if not (file_type in ["txt", "md", "py", "js", "html", "css", "json", "csv"] or 
-                mime_type.startswith("text/")):
+        if not _is_text_file(file):
             # Acknowledge receipt but explain we can't process this type
             client.chat_postEphemeral(
                 channel=channel_id,
@@ -43,112 +192,8 @@ def file_shared_callback(client: WebClient, event, logger: Logger, context: Bolt
             )
             return
             
-        # Get file content
-        file_content = ""
-        if file.get("url_private"):
-            # Download the file content
-            response = client.files_info(
-                file=file_id,
-                include_content=True
-            )
-            if response and response.get("content"):
-                file_content = response.get("content")
-            else:
-                # Try to get content from permalink
-                permalink = file.get("permalink")
-                if permalink:
-                    client.chat_postEphemeral(
-                        channel=channel_id,
-                        user=user_id,
-                        text=f"I can't directly access the file content. You can copy and paste it to me, or use the /ask-bolty command with your question about the file."
-                    )
-                    return
-        
-        if not file_content:
-            client.chat_postEphemeral(
-                channel=channel_id,
-                user=user_id,
-                text="I couldn't read the content of this file. Please try uploading it again or copy and paste the content."
-            )
-            return
-            
-        # Truncate very large files
-        if len(file_content) > 15000:
-            file_content = file_content[:15000] + "\n\n[Content truncated due to length...]"
-            
-        # Get user preferences
-        preferences = get_user_preferences(user_id)
-        
-        # Get conversation history if memory is enabled
-        conversation_context = []
-        if preferences["memory_enabled"]:
-            conversation_context = get_conversation_history(user_id, channel_id)
-            
-        # Get system prompt based on user preferences
-        system_content = get_system_prompt(user_id)
-        
-        # Add file context to the system prompt
-        file_system_prompt = f"{system_content}\n\nThe user has shared a {file_type} file with the following content:\n\n{file_content}\n\nPlease analyze this content and provide helpful insights or answer questions about it."
-        
-        # Post "thinking" message
-        response = client.chat_postEphemeral(
-            channel=channel_id,
-            user=user_id,
-            text="⏳ Analyzing your file..."
-        )
-        
-        # Generate response
-        try:
-            prompt = f"I've uploaded a {file_type} file. Please analyze it and provide insights."
-            
-            # Add the file content to conversation history
-            if preferences["memory_enabled"]:
-                add_to_conversation_history(
-                    user_id, 
-                    f"[Shared a file: {file.get('name', 'unnamed')}]\n\nFile content (may be truncated):\n{file_content[:500]}...", 
-                    True, 
-                    channel_id
-                )
-            
-            # Get AI response
-            ai_response = get_provider_response(user_id, prompt, conversation_context, file_system_prompt)
-            
-            # Update the message with the response
-            client.chat_update(
-                channel=channel_id,
-                ts=response["ts"],
-                blocks=[
-                    {
-                        "type": "rich_text",
-                        "elements": [
-                            {
-                                "type": "rich_text_section",
-                                "elements": [
-                                    {"type": "text", "text": "📄 "},
-                                    {"type": "text", "text": file.get("name", "File"), "style": {"bold": True}},
-                                    {"type": "text", "text": " analysis:"}
-                                ],
-                            },
-                            {
-                                "type": "rich_text_section",
-                                "elements": [{"type": "text", "text": "\n\n" + ai_response}],
-                            },
-                        ],
-                    }
-                ],
-            )
-            
-            # Add AI response to conversation history if memory is enabled
-            if preferences["memory_enabled"]:
-                add_to_conversation_history(user_id, ai_response, False, channel_id)
-                
-        except Exception as e:
-            logger.error(f"Error generating response for file: {e}")
-            client.chat_update(
-                channel=channel_id,
-                ts=response["ts"],
-                text=f"Error analyzing file: {e}"
-            )
+        # Download and analyze the file in the background so this listener thread is free for other events
+        run_in_background(_analyze_file, client, file, user_id, channel_id, logger)
             
     except Exception as e:
         logger.error(f"Error in file_shared_callback: {e}")
\ No newline at end of file
@@ -1,10 +1,84 @@
+import json
+import threading
+from contextlib import contextmanager
+from cachetools import TTLCache
 from slack_bolt import BoltContext
 from slack_sdk import WebClient
 from logging import Logger
 from ai.transcription import transcribe_audio
 from ai.providers import get_provider_response
-from state_store.conversation_memory import add_to_conversation_history, get_conversation_history
+from state_store.conversation_memory import get_conversation_history
+from state_store.async_writer import enqueue_history_add
+from state_store.get_user_state import get_user_state
+from state_store._redis import get_redis
+from state_store.response_cache import get_cached, make_key, normalize_prompt, set_cached
 from state_store.user_preferences import get_user_preferences, get_system_prompt
+from ..listener_utils.background import run_in_background
+from ..listener_utils.listener_constants import AUDIO_EXTS
+from ..listener_utils.message_blocks import make_voice_reply_blocks
+from ..listener_utils.rate_limit import RateLimitedClient
+
+# Voice messages already picked up, keyed by (channel, ts), so Slack's redeliveries aren't transcribed twice.
+# With REDIS_URL set the check is also shared between app instances, which may each receive a redelivery
+VOICE_DEDUPE_TTL = 600
+_voice_seen = TTLCache(maxsize=10000, ttl=VOICE_DEDUPE_TTL)
+_voice_lock = threading.Lock()
+
+
+def _is_duplicate_voice(channel_id: str, ts: str) -> bool:
+    key = (channel_id, ts)
+    with _voice_lock:
+        if key in _voice_seen:
+            return True
+        _voice_seen[key] = True
+
+    redis = get_redis()
+    if redis is None:
+        return False
+    try:
+        return not redis.set(f"voice-seen:{channel_id}:{ts}", 1, nx=True, ex=VOICE_DEDUPE_TTL)
+    except Exception:
+        # Better to risk a duplicate reply than to drop the message
+        return False
+
+
+# Seconds the AI may take before the transcription is shown with a "Thinking" note
+THINKING_NOTE_DELAY = 0.4
+
+
+@contextmanager
+def _thinking_note(client: WebClient, channel_id: str, ts: str, transcription: str, logger: Logger):
+    """
+    Show the transcription with a "Thinking" note if the body takes longer than THINKING_NOTE_DELAY.
+    A fast reply replaces the placeholder directly, saving a Slack round trip, and the note can never
+    land after the reply.
+    """
+    finished = threading.Event()
+    update_lock = threading.Lock()
+
+    def _show_note():
+        with update_lock:
+            if finished.is_set():
+                return
+            try:
+                client.chat_update(
+                    channel=channel_id,
+                    ts=ts,
+                    text=f"🎤 *Transcription:*\n>{transcription}\n\n⏳ Thinking...",
+                )
+            except Exception as e:
+                logger.error(f"Error showing transcription: {e}")
+
+    timer = threading.Timer(THINKING_NOTE_DELAY, _show_note)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
+        with update_lock:
+            finished.set()
+
 
 def handle_voice_message(client: WebClient, event: dict, context: BoltContext, logger: Logger):
     """
@@ -12,11 +86,17 @@ def handle_voice_message(client: WebClient, event: dict, context: BoltContext, l
     Transcribes the audio and responds with AI-generated content.
     """
     try:
+        # The placeholder, the thinking note and the reply go out in quick succession, so pace them
+        client = RateLimitedClient(client)
+
         # Extract necessary information
         user_id = event.get("user")
         channel_id = event.get("channel")
         thread_ts = event.get("thread_ts", event.get("ts"))
         
+        if _is_duplicate_voice(channel_id, event.get("ts")):
+            return
+        
         # Get the file information
         files = event.get("files", [])
         if not files or len(files) == 0:
@@ -24,11 +104,7 @@ def handle_voice_message(client: WebClient, event: dict, context: BoltContext, l
             return
         
         # Find the voice message file
-        voice_file = None
-        for file in files:
-            if file.get("filetype") in ["m4a", "mp3", "ogg", "wav"]:
-                voice_file = file
-                break
+        voice_file = next((file for file in files if file.get("filetype") in AUDIO_EXTS), None)
         
         if not voice_file:
             logger.error("No voice file found in message")
@@ -47,25 +123,38 @@ def handle_voice_message(client: WebClient, event: dict, context: BoltContext, l
             text="🎤 Transcribing voice message..."
         )
         
+        # Transcribe and reply in the background so the listener returns before Slack's retry deadline
+        run_in_background(_process_voice, client, voice_file, user_id, channel_id, response["ts"], logger)
+            
+    except Exception as e:
+        logger.error(f"Error handling voice message: {e}")
+        try:
+            client.chat_postMessage(
+                channel=channel_id,
+                thread_ts=thread_ts,
+                text=f"❌ Error processing voice message: {e}"
+            )
+        except:
+            pass
+
+
+def _process_voice(client: WebClient, voice_file: dict, user_id: str, channel_id: str, ts: str, logger: Logger):
+    """
+    Transcribe a voice message and replace its placeholder message with the transcription and the AI's reply.
+    """
+    try:
         # Transcribe the audio
-        transcription = transcribe_audio(file_url, logger)
+        transcription = transcribe_audio(voice_file["url_private"], logger, client.token, voice_file.get("filetype"))
         
         # If transcription failed or is empty
         if transcription.startswith("Error:") or not transcription.strip():
             client.chat_update(
                 channel=channel_id,
-                ts=response["ts"],
+                ts=ts,
                 text=f"❌ {transcription if transcription.strip() else 'Failed to transcribe voice message.'}"
             )
             return
         
-        # Update with transcription
-        client.chat_update(
-            channel=channel_id,
-            ts=response["ts"],
-            text=f"🎤 *Transcription:*\n>{transcription}\n\n⏳ Thinking..."
-        )
-        
         # Get user preferences
         preferences = get_user_preferences(user_id)
         
@@ -74,72 +163,48 @@ def handle_voice_message(client: WebClient, event: dict, context: BoltContext, l
         if preferences["memory_enabled"]:
             conversation_context = get_conversation_history(user_id, channel_id)
             # Add transcription to history
-            add_to_conversation_history(user_id, transcription, True, channel_id)
+            enqueue_history_add(user_id, transcription, True, channel_id)
         
         # Get system prompt based on user preferences
-        system_content = get_system_prompt(user_id)
+        system_content = get_system_prompt(user_id, preferences)
         
         # Generate AI response
         try:
-            ai_response = get_provider_response(user_id, transcription, conversation_context, system_content)
+            provider_name, model_name = get_user_state(user_id, False)
+            
+            # Repeated questions are answered from the response cache; transcripts of the same question
+            # usually differ only in case and punctuation, so they're compared normalized
+            cache_key = make_key(
+                provider_name, model_name, system_content, normalize_prompt(transcription), json.dumps(conversation_context)
+            )
+            ai_response = get_cached(cache_key)
+            if ai_response is None:
+                with _thinking_note(client, channel_id, ts, transcription, logger):
+                    ai_response = get_provider_response(user_id, transcription, conversation_context, system_content)
+                set_cached(cache_key, ai_response)
             
             # Update the message with the response
             client.chat_update(
                 channel=channel_id,
-                ts=response["ts"],
-                blocks=[
-                    {
-                        "type": "rich_text",
-                        "elements": [
-                            {
-                                "type": "rich_text_section",
-                                "elements": [
-                                    {"type": "text", "text": "🎤 "},
-                                    {"type": "text", "text": "Transcription:", "style": {"bold": True}}
-                                ]
-                            }
-                        ]
-                    },
-                    {
-                        "type": "rich_text",
-                        "elements": [
-                            {
-                                "type": "rich_text_quote",
-                                "elements": [{"type": "text", "text": transcription}]
-                            }
-                        ]
-                    },
-                    {
-                        "type": "rich_text",
-                        "elements": [
-                            {
-                                "type": "rich_text_section",
-                                "elements": [{"type": "text", "text": ai_response}]
-                            }
-                        ]
-                    }
-                ]
+                ts=ts,
+                blocks=make_voice_reply_blocks(transcription, ai_response),
             )
             
             # Add AI response to conversation history if memory is enabled
             if preferences["memory_enabled"]:
-                add_to_conversation_history(user_id, ai_response, False, channel_id)
+                enqueue_history_add(user_id, ai_response, False, channel_id)
                 
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             client.chat_update(
                 channel=channel_id,
-                ts=response["ts"],
+                ts=ts,
                 text=f"🎤 *Transcription:*\n>{transcription}\n\n❌ Error generating response: {e}"
             )
             
     except Exception as e:
-        logger.error(f"Error handling voice message: {e}")
+        logger.error(f"Error processing voice message: {e}")
         try:
-            client.chat_postMessage(
-                channel=channel_id,
-                thread_ts=thread_ts,
-                text=f"❌ Error processing voice message: {e}"
-            )
-        except:
-            pass
\ No newline at end of file
+            client.chat_update(channel=channel_id, ts=ts, text=f"❌ Error processing voice message: {e}")
+        except Exception as update_error:
+            logger.error(f"Error reporting voice message failure: {update_error}")
@@ -0,0 +1,80 @@
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from agents.agent_registry import AgentRegistry
+
+"""
+A shared thread pool for work that should overlap with Slack API calls, such as starting an AI
+request before the loading message has been posted. Sized by `BACKGROUND_WORKERS` (default 8).
+"""
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("BACKGROUND_WORKERS", "8")),
+    thread_name_prefix="bolty-background",
+)
+
+
+def _log_exception(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Background task failed: {future.exception()}")
+
+
+def run_in_background(fn, *args, **kwargs) -> Future:
+    """
+    Submit `fn(*args, **kwargs)` to the shared executor.
+
+    Args:
+        fn: The callable to run
+        *args: Positional arguments for `fn`
+        **kwargs: Keyword arguments for `fn`
+
+    Returns:
+        The future for the call. Exceptions are logged and re-raised by `future.result()`.
+    """
+    future = executor.submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_exception)
+    return future
+
+
+def agent_response(agent_name: str, text: str, conversation_context: str) -> str:
+    """
+    Get a reply from an agent's shared instance; meant to be passed to `run_in_background`.
+
+    Args:
+        agent_name: Name of the agent in the registry
+        text: The user's message
+        conversation_context: The conversation so far
+
+    Returns:
+        The agent's reply
+    """
+    return AgentRegistry.get_agent_instance(agent_name).process_message(text, conversation_context)
+
+
+def update_message_when_done(pending_response: Future, client, channel_id: str, ts: str):
+    """
+    Replace a loading message with the result of `pending_response` once it is ready, so the listener
+    that started the work can return straight away. The update runs on the thread that finishes the
+    future, which avoids tying up a second worker to wait for it.
+
+    Args:
+        pending_response: Future resolving to the reply text
+        client: Slack client used for the update
+        channel_id: Channel of the loading message
+        ts: Timestamp of the loading message
+    """
+
+    def _update(future: Future):
+        try:
+            text = future.result()
+        except Exception as e:
+            text = f"Received an error from Bolty:\n{e}"
+        try:
+            client.chat_update(channel=channel_id, ts=ts, text=text)
+        except Exception as e:
+            logger.error(f"Error updating message: {e}")
+
+    pending_response.add_done_callback(_update)
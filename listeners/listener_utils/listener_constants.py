@@ -12,3 +12,9 @@ Please create a quick summary of the conversation in this channel to help them c
 Don't use user IDs or names in your response.
 """
 DEFAULT_LOADING_TEXT = "Thinking..."
+
+# File types routed to the voice message handler
+AUDIO_EXTS = frozenset({"m4a", "mp3", "ogg", "opus", "wav", "webm"})
+
+# File types the file_shared handler can analyze as text
+TEXT_EXTS = frozenset({"txt", "md", "py", "js", "html", "css", "json", "csv"})
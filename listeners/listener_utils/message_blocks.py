@@ -0,0 +1,168 @@
+import threading
+import uuid
+from typing import Optional
+
+from cachetools import TTLCache
+
+"""
+Block Kit builders for AI responses: the ones that carry the Regenerate / Helpful / Not Helpful buttons,
+used in `ask_callback` and `handle_button_click`, and the summary, file analysis and voice reply layouts
+used in `summarize_callback`, `file_shared_callback` and `handle_voice_message`. The static blocks are
+built once at import time.
+"""
+
+# Slack rejects section text over 3000 characters and image alt_text over 2000
+MAX_SECTION_TEXT = 2800
+MAX_ALT_TEXT = 2000
+
+# Slack leaves the message out of button payloads from ephemeral messages, so the blocks of each response with
+# buttons are kept here, by the id its buttons share, for as long as its response_url can still edit it
+RESPONSE_URL_TTL = 1800
+_response_blocks = TTLCache(maxsize=10000, ttl=RESPONSE_URL_TTL)
+_response_blocks_lock = threading.Lock()
+
+DIVIDER_BLOCK = {"type": "divider"}
+
+FEEDBACK_HELPFUL_BLOCK = {
+    "type": "context",
+    "elements": [{"type": "mrkdwn", "text": "✅ *Feedback received:* Thanks for the positive feedback!"}],
+}
+
+FEEDBACK_NOT_HELPFUL_BLOCK = {
+    "type": "context",
+    "elements": [
+        {"type": "mrkdwn", "text": "📝 *Feedback received:* Thanks for letting us know this response wasn't helpful."}
+    ],
+}
+
+
+def clip_text(text: str, limit: int = MAX_SECTION_TEXT) -> str:
+    marker = "\n…(truncated)"
+    if len(text) <= limit:
+        return text
+    return text[: limit - len(marker)] + marker
+
+
+def make_message_block(prompt: str, response: str) -> dict:
+    return {
+        "type": "rich_text",
+        "elements": [
+            {"type": "rich_text_quote", "elements": [{"type": "text", "text": prompt}]},
+            {"type": "rich_text_section", "elements": [{"type": "text", "text": response}]},
+        ],
+    }
+
+
+def _rich_text_section(text: str) -> dict:
+    return {"type": "rich_text_section", "elements": [{"type": "text", "text": text}]}
+
+
+TRANSCRIPTION_HEADER_BLOCK = {
+    "type": "rich_text",
+    "elements": [
+        {
+            "type": "rich_text_section",
+            "elements": [
+                {"type": "text", "text": "🎤 "},
+                {"type": "text", "text": "Transcription:", "style": {"bold": True}},
+            ],
+        }
+    ],
+}
+
+
+def make_voice_reply_blocks(transcription: str, response: str) -> list:
+    return [
+        TRANSCRIPTION_HEADER_BLOCK,
+        {
+            "type": "rich_text",
+            "elements": [{"type": "rich_text_quote", "elements": [{"type": "text", "text": transcription}]}],
+        },
+        {"type": "rich_text", "elements": [_rich_text_section(response)]},
+    ]
+
+
+def make_summary_blocks(header_text: str, body_text: str) -> list:
+    return [
+        {"type": "header", "text": {"type": "plain_text", "text": header_text}},
+        DIVIDER_BLOCK,
+        {"type": "rich_text", "elements": [_rich_text_section(body_text)]},
+    ]
+
+
+def make_file_analysis_blocks(filename: str, body_text: str) -> list:
+    return [
+        {
+            "type": "rich_text",
+            "elements": [
+                {
+                    "type": "rich_text_section",
+                    "elements": [
+                        {"type": "text", "text": "📄 "},
+                        {"type": "text", "text": filename, "style": {"bold": True}},
+                        {"type": "text", "text": " analysis:"},
+                    ],
+                },
+                _rich_text_section("\n\n" + body_text),
+            ],
+        }
+    ]
+
+
+def action_base(action_id: str) -> str:
+    # The id shared by a response's buttons, without the one-letter suffix that tells them apart
+    return action_id.rsplit("_", 1)[-1][:-1]
+
+
+def make_response_blocks(prompt: str, response: str) -> list:
+    base = uuid.uuid4().hex
+    blocks = [make_message_block(prompt, response), *make_actions_blocks(base)]
+    with _response_blocks_lock:
+        _response_blocks[base] = blocks
+    return blocks
+
+
+def get_response_blocks(action_id: str) -> Optional[list]:
+    with _response_blocks_lock:
+        return _response_blocks.get(action_base(action_id))
+
+
+def make_actions_blocks(base: str) -> list:
+    # One random id per message; the suffixes keep the three action_ids distinct
+    return [
+        {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "🔄 Regenerate", "emoji": True},
+                    "action_id": f"regenerate_{base}r",
+                    "style": "primary",
+                },
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "👍 Helpful", "emoji": True},
+                    "action_id": f"feedback_helpful_{base}h",
+                },
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "👎 Not Helpful", "emoji": True},
+                    "action_id": f"feedback_not_helpful_{base}n",
+                },
+            ],
+        }
+    ]
+
+
+def make_try_again_block(base: str) -> dict:
+    return {
+        "type": "actions",
+        "elements": [
+            {
+                "type": "button",
+                "text": {"type": "plain_text", "text": "🔄 Try Again", "emoji": True},
+                "action_id": f"regenerate_{base}t",
+                "style": "primary",
+            }
+        ],
+    }
@@ -0,0 +1,107 @@
+import copy
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+from .rate_limit import wait_for_slot
+
+"""
+Keeps chat writes to a channel in the order they were made. Handlers that write from more than one thread
+(a background generation, a streaming updater, a follow-up message) could otherwise have their requests
+overtake each other on the wire, so e.g. an update lands before the message it follows.
+`OrderedClient` wraps a `WebClient` and sends the methods in `WRITE_METHODS` one at a time per token and channel,
+in the order they were called, paced by `wait_for_slot` like `RateLimitedClient`. A write that Slack rate-limits
+gives up its turn while it waits out the Retry-After, so one 429 doesn't hold up every other write to the channel;
+it is sent after the writes that queued in the meantime.
+"""
+
+WRITE_METHODS = {"chat_postMessage", "chat_update", "chat_postEphemeral", "chat_delete"}
+
+# Times a rate-limited write is sent again. These retries replace the client's RateLimitErrorRetryHandler,
+# which would sleep while holding the channel's turn
+MAX_RATE_LIMIT_RETRIES = 2
+
+
+class _ChannelTurns:
+    """
+    A fair lock: threads get their turn in the order they asked for it, which `threading.Lock` doesn't promise.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    @contextmanager
+    def turn(self):
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._serving += 1
+                self._condition.notify_all()
+
+
+# Turn order per token and channel, dropped once no thread is waiting for or holding a turn
+_channel_turns = weakref.WeakValueDictionary()
+_channel_turns_lock = threading.Lock()
+
+
+def channel_turns(token: str, channel: str) -> _ChannelTurns:
+    key = (token, channel)
+    with _channel_turns_lock:
+        turns = _channel_turns.get(key)
+        if turns is None:
+            turns = _channel_turns[key] = _ChannelTurns()
+        return turns
+
+
+def _retry_after(error: SlackApiError) -> float:
+    for name, value in error.response.headers.items():
+        if name.lower() == "retry-after":
+            return float(value[0] if isinstance(value, list) else value)
+    return 1.0
+
+
+class OrderedClient:
+    """
+    A `WebClient` proxy that serializes the methods in `WRITE_METHODS` per channel and passes everything else through.
+    Use its `chat_postMessage` instead of Bolt's `say`, which posts through the unwrapped client.
+    """
+
+    def __init__(self, client: WebClient):
+        self._client = client
+        # Writes go through a copy without the 429 retry handler, so the wait happens outside the channel's turn
+        self._write_client = copy.copy(client)
+        self._write_client.retry_handlers = [
+            handler for handler in client.retry_handlers if not isinstance(handler, RateLimitErrorRetryHandler)
+        ]
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name not in WRITE_METHODS:
+            return attr
+        write = getattr(self._write_client, name)
+
+        def ordered(*args, **kwargs):
+            turns = channel_turns(self._client.token, kwargs.get("channel", ""))
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                with turns.turn():
+                    wait_for_slot(name, kwargs.get("channel", ""))
+                    try:
+                        return write(*args, **kwargs)
+                    except SlackApiError as e:
+                        if e.response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                            raise
+                        delay = _retry_after(e)
+                time.sleep(delay)
+
+        return ordered
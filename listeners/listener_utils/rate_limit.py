@@ -0,0 +1,58 @@
+import threading
+import time
+from cachetools import TTLCache
+from slack_sdk import WebClient
+
+"""
+Client-side pacing for the chat methods Bolty calls in bursts (placeholder, streamed updates, final update).
+`RateLimitedClient` wraps a `WebClient` and spaces calls to the same method and channel by the interval
+in `METHOD_INTERVALS`, so we stay under Slack's per-channel limits instead of waiting out a 429.
+`OrderedClient` paces its writes the same way, inside each write's turn.
+Any 429 that still happens is retried by `OrderedClient` or by the `RateLimitErrorRetryHandler` configured in `app.py`.
+"""
+
+# Minimum seconds between calls to a method for the same channel
+METHOD_INTERVALS = {
+    "chat_postMessage": 1.0,
+    "chat_update": 1.0,
+    "chat_postEphemeral": 0.6,
+}
+
+# Next free slot per method and channel. An entry is only needed until its slot has passed, so entries
+# expire instead of accumulating one per channel ever written to
+_next_slot = TTLCache(maxsize=10000, ttl=60)
+_slot_lock = threading.Lock()
+
+
+def wait_for_slot(method: str, channel: str):
+    interval = METHOD_INTERVALS.get(method)
+    if not interval:
+        return
+
+    key = (method, channel)
+    with _slot_lock:
+        now = time.monotonic()
+        slot = max(now, _next_slot.get(key, now))
+        _next_slot[key] = slot + interval
+    if slot > now:
+        time.sleep(slot - now)
+
+
+class RateLimitedClient:
+    """
+    A `WebClient` proxy that paces the methods in `METHOD_INTERVALS` and passes everything else through.
+    """
+
+    def __init__(self, client: WebClient):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name not in METHOD_INTERVALS:
+            return attr
+
+        def paced(*args, **kwargs):
+            wait_for_slot(name, kwargs.get("channel", ""))
+            return attr(*args, **kwargs)
+
+        return paced
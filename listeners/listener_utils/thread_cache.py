@@ -0,0 +1,52 @@
+import threading
+from typing import List
+from cachetools import TTLCache
+from slack_sdk import WebClient
+
+"""
+Short-lived cache of thread messages for `app_mentioned_callback` and `app_messaged_callback`.
+Follow-up messages in a thread see almost the same history as the previous turn, so on a hit only the
+replies newer than the cached ones are fetched and appended instead of re-reading the whole thread.
+"""
+
+# Seconds a thread's messages are reused; bounds how long edits and deletions can go unnoticed
+THREAD_CACHE_TTL = 60
+
+_threads = TTLCache(maxsize=256, ttl=THREAD_CACHE_TTL)
+_threads_lock = threading.Lock()
+
+
+def get_thread_messages(client: WebClient, channel_id: str, thread_ts: str, limit: int = 10) -> List[dict]:
+    """
+    Get the messages of a thread, oldest first
+
+    Args:
+        client: Slack client
+        channel_id: The channel containing the thread
+        thread_ts: The thread's parent timestamp
+        limit: Maximum number of messages to return
+
+    Returns:
+        Up to `limit` messages, ending with the newest one fetched
+    """
+    key = (channel_id, thread_ts)
+    with _threads_lock:
+        cached = _threads.get(key)
+
+    if cached is None:
+        response = client.conversations_replies(channel=channel_id, ts=thread_ts, limit=limit)
+        messages = response["messages"]
+    else:
+        newest = cached[-1]["ts"]
+        response = client.conversations_replies(channel=channel_id, ts=thread_ts, oldest=newest, limit=limit)
+        # The parent message is always returned first, so keep only what arrived after the cached messages
+        messages = cached + [message for message in response["messages"] if float(message["ts"]) > float(newest)]
+    messages = messages[-limit:]
+
+    with _threads_lock:
+        # A thread with more replies than one page can't be extended from the cache reliably
+        if response.get("has_more"):
+            _threads.pop(key, None)
+        else:
+            _threads[key] = messages
+    return list(messages)
@@ -0,0 +1,35 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+from functools import lru_cache
+
+DEFAULT_LOCALAI_API_URL = "https://api.deepinfra.com/v1/openai"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Snapshot of the environment settings read by command handlers.
+    """
+
+    active_agent: Optional[str]
+    localai_api_key: str
+    localai_api_url: str
+    localai_custom_models: str
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the settings snapshot, built from the environment on first use.
+    Anything that writes these environment variables must call `get_settings.cache_clear()` afterwards.
+
+    Returns:
+        The current Settings
+    """
+    return Settings(
+        active_agent=os.environ.get("ACTIVE_AGENT"),
+        localai_api_key=os.environ.get("LOCALAI_API_KEY", ""),
+        localai_api_url=os.environ.get("LOCALAI_API_URL", DEFAULT_LOCALAI_API_URL),
+        localai_custom_models=os.environ.get("LOCALAI_CUSTOM_MODELS", ""),
+    )
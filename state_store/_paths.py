@@ -0,0 +1,74 @@
+import hashlib
+import os
+import re
+
+# Locations of the file-based state stores. The directories are created once here, so reads and
+# writes don't have to call os.makedirs every time.
+
+CONVERSATIONS_DIR = "./data/conversations"
+SUMMARIES_DIR = "./data/summaries"
+MEMORIES_DIR = "./data/memories"
+PREFERENCES_DIR = "./data/preferences"
+STATE_DB_PATH = "./data/state.db"
+
+for _directory in (CONVERSATIONS_DIR, SUMMARIES_DIR, MEMORIES_DIR, PREFERENCES_DIR):
+    os.makedirs(_directory, exist_ok=True)
+
+# Conversation files are spread over 256 subdirectories, so no single directory grows with the number
+# of users and channels. Each subdirectory is created by the first write into it
+_created_shard_dirs = set()
+
+# Slack user and channel IDs and message timestamps; anything else could escape the data directories
+_ID_PATTERN = re.compile(r"[A-Za-z0-9.]+")
+
+
+def shard(name: str) -> str:
+    """
+    Get the subdirectory a sharded state file belongs in
+
+    Args:
+        name: The file's name stem, e.g. from `context_id`
+
+    Returns:
+        Two hex digits derived from the name
+    """
+    return hashlib.blake2s(name.encode(), digest_size=1).hexdigest()
+
+
+def make_shard_dir(filepath: str) -> None:
+    """
+    Create the shard subdirectory of a file about to be written, once per process
+
+    Args:
+        filepath: Path of the sharded state file
+    """
+    directory = os.path.dirname(filepath)
+    if directory not in _created_shard_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _created_shard_dirs.add(directory)
+
+
+def context_id(user_id: str, channel_id: str = None, thread_ts: str = None) -> str:
+    """
+    Build the file name stem for a user, channel and thread context
+
+    Args:
+        user_id: The Slack user ID
+        channel_id: Optional channel ID
+        thread_ts: Optional thread timestamp
+
+    Returns:
+        The IDs that were given, joined with underscores
+
+    Raises:
+        ValueError: If an ID isn't a plain Slack ID or timestamp
+    """
+    parts = [user_id]
+    if channel_id:
+        parts.append(channel_id)
+    if thread_ts:
+        parts.append(thread_ts)
+    for part in parts:
+        if not isinstance(part, str) or not _ID_PATTERN.fullmatch(part):
+            raise ValueError(f"Invalid ID for a state file: {part!r}")
+    return "_".join(parts)
@@ -0,0 +1,37 @@
+import logging
+import os
+import threading
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+# Optional Redis connection shared by the state stores. Set `REDIS_URL` to keep hot state in Redis;
+# without it, or without the `redis` package, the stores fall back to their JSON files.
+
+_client = None
+_client_lock = threading.Lock()
+_resolved = False
+
+
+def get_redis():
+    """
+    Get the shared Redis client, connecting on first use
+
+    Returns:
+        A `redis.Redis` client, or None if `REDIS_URL` is unset or the `redis` package is missing
+    """
+    global _client, _resolved
+    if _resolved:
+        return _client
+    with _client_lock:
+        if not _resolved:
+            url = os.environ.get("REDIS_URL")
+            if url:
+                try:
+                    import redis
+
+                    _client = redis.Redis.from_url(url)
+                except ImportError as e:
+                    logger.error(f"REDIS_URL is set but Redis is unavailable, using JSON files: {e}")
+            _resolved = True
+    return _client
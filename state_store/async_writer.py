@@ -0,0 +1,117 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from state_store.conversation_memory import add_to_conversation_history
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+# Conversation history writes taken off the reply path. `enqueue_history_add` returns immediately and a
+# single daemon thread applies the writes in order, up to `MAX_BATCH` per wakeup. Pending writes are
+# flushed at exit. Reads of a conversation call `wait_for_pending` first, so a quick follow-up message
+# still sees the previous turn even if its writes are queued.
+
+MAX_BATCH = 16
+FLUSH_TIMEOUT = 5.0
+
+_queue = queue.Queue()
+
+# Queued writes not yet applied, per conversation
+_pending = {}
+_pending_changed = threading.Condition()
+
+
+def _conversation_key(user_id: str, channel_id: str = None, thread_ts: str = None) -> tuple:
+    return user_id, channel_id or "", thread_ts or ""
+
+
+def _drain():
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        for args in batch:
+            try:
+                add_to_conversation_history(*args)
+            except Exception as e:
+                logger.error(f"Error writing conversation history: {e}")
+            finally:
+                key = _conversation_key(args[0], args[3], args[4])
+                with _pending_changed:
+                    _pending[key] -= 1
+                    if not _pending[key]:
+                        del _pending[key]
+                    _pending_changed.notify_all()
+                _queue.task_done()
+
+
+_writer = threading.Thread(target=_drain, name="history-writer", daemon=True)
+_writer.start()
+
+
+def enqueue_history_add(user_id: str, message: str, is_user: bool, channel_id: str = None, thread_ts: str = None) -> None:
+    """
+    Queue a message to be added to the conversation history
+
+    Args:
+        user_id: The Slack user ID
+        message: The message text
+        is_user: True if the message is from the user, False if from the bot
+        channel_id: Optional channel ID for channel-specific history
+        thread_ts: Optional thread timestamp for thread-specific history
+    """
+    key = _conversation_key(user_id, channel_id, thread_ts)
+    with _pending_changed:
+        _pending[key] = _pending.get(key, 0) + 1
+    _queue.put((user_id, message, is_user, channel_id, thread_ts))
+
+
+def wait_for_pending(user_id: str, channel_id: str = None, thread_ts: str = None, timeout: float = FLUSH_TIMEOUT) -> bool:
+    """
+    Wait for the queued writes to one conversation to be applied
+
+    Args:
+        user_id: The Slack user ID
+        channel_id: Optional channel ID for channel-specific history
+        thread_ts: Optional thread timestamp for thread-specific history
+        timeout: Maximum number of seconds to wait
+
+    Returns:
+        True if no write to the conversation is still queued
+    """
+    if threading.current_thread() is _writer:
+        # The writer applies writes in order, so it never has to wait for its own queue
+        return True
+    key = _conversation_key(user_id, channel_id, thread_ts)
+    with _pending_changed:
+        return _pending_changed.wait_for(lambda: key not in _pending, timeout)
+
+
+def flush(timeout: float = FLUSH_TIMEOUT) -> bool:
+    """
+    Wait for queued history writes to be applied
+
+    Args:
+        timeout: Maximum number of seconds to wait
+
+    Returns:
+        True if every queued write was applied in time
+    """
+    deadline = time.monotonic() + timeout
+    with _queue.all_tasks_done:
+        while _queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _queue.all_tasks_done.wait(remaining)
+    return True
+
+
+atexit.register(flush)
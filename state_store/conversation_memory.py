@@ -1,14 +1,88 @@
 import os
 import json
 import logging
+import re
+import threading
+from collections import deque
 from typing import List, Dict, Optional
 
+from cachetools import LRUCache
+
+from state_store.vector_memory import add_memory
+from state_store._redis import get_redis
+from state_store._paths import CONVERSATIONS_DIR, SUMMARIES_DIR, context_id, make_shard_dir, shard
+
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 # Maximum number of messages to store in conversation history
 MAX_HISTORY_LENGTH = 10
 
+# Seconds an idle conversation is kept when history lives in Redis (REDIS_URL set)
+REDIS_HISTORY_TTL = int(os.environ.get("REDIS_HISTORY_TTL", str(7 * 24 * 3600)))
+
+# Conversation files are append-only JSONL, one message per line. The latest messages of recently used
+# conversations are kept in memory, so appends don't re-read the file; once a file holds this many times
+# MAX_HISTORY_LENGTH lines it is rewritten with just the latest ones
+HISTORY_COMPACT_FACTOR = 4
+_history_cache = LRUCache(maxsize=4096)
+_history_lock = threading.Lock()
+
+# Latest messages kept verbatim; older messages are folded into the rolling summary
+SUMMARY_KEEP_RECENT = 6
+
+# Contexts whose rolling summary is being updated, so concurrent turns don't summarize the same messages twice
+_summaries_updating = set()
+_summaries_lock = threading.Lock()
+
+# Lines kept by the heuristic summary, and its size cap (about 400 tokens at 4 characters per token)
+_KEY_LINE_PATTERN = re.compile(r"\b(todo|decided|decision|plan|agreed|next step|action item|must|deadline)\b", re.IGNORECASE)
+HEURISTIC_SUMMARY_MAX_CHARS = 1600
+
+def _redis_key(user_id: str, channel_id: str = None, thread_ts: str = None) -> str:
+    return f"memory:{user_id}:{channel_id or ''}:{thread_ts or ''}"
+
+def _history_path(user_id: str, channel_id: str = None, thread_ts: str = None) -> str:
+    name = context_id(user_id, channel_id, thread_ts)
+    return f"{CONVERSATIONS_DIR}/{shard(name)}/{name}.jsonl"
+
+def _legacy_history_paths(filepath: str) -> tuple:
+    # Earlier layouts kept every conversation directly in CONVERSATIONS_DIR, first as a JSON array, then as JSONL
+    name = os.path.basename(filepath)[:-len(".jsonl")]
+    return f"{CONVERSATIONS_DIR}/{name}.jsonl", f"{CONVERSATIONS_DIR}/{name}.json"
+
+def _load_file_history(filepath: str) -> List:
+    """
+    Get the cache entry for a conversation file, reading it on a miss. Must be called with _history_lock held.
+
+    Returns:
+        [deque of the latest messages, number of lines in the file]
+    """
+    entry = _history_cache.get(filepath)
+    if entry is None:
+        messages = deque(maxlen=MAX_HISTORY_LENGTH)
+        line_count = 0
+        if os.path.exists(filepath):
+            lines = deque(maxlen=MAX_HISTORY_LENGTH)
+            with open(filepath, "r") as file:
+                for line in file:
+                    lines.append(line)
+                    line_count += 1
+            messages.extend(json.loads(line) for line in lines)
+        else:
+            # Histories saved in an earlier layout are read from there and moved by the next append,
+            # which rewrites the file while line_count is 0
+            legacy_jsonl_path, legacy_json_path = _legacy_history_paths(filepath)
+            if os.path.exists(legacy_jsonl_path):
+                with open(legacy_jsonl_path, "r") as file:
+                    messages.extend(json.loads(line) for line in deque(file, maxlen=MAX_HISTORY_LENGTH))
+            elif os.path.exists(legacy_json_path):
+                with open(legacy_json_path, "r") as file:
+                    messages.extend(json.load(file))
+        entry = [messages, line_count]
+        _history_cache[filepath] = entry
+    return entry
+
 def get_conversation_history(user_id: str, channel_id: str = None, thread_ts: str = None) -> List[Dict]:
     """
     Retrieve conversation history for a user in a specific context (channel/thread)
@@ -22,23 +96,17 @@ def get_conversation_history(user_id: str, channel_id: str = None, thread_ts: st
         List of message dictionaries containing 'user', 'text', and 'timestamp'
     """
     try:
-        # Create a unique identifier for this conversation context
-        context_id = f"{user_id}"
-        if channel_id:
-            context_id += f"_{channel_id}"
-        if thread_ts:
-            context_id += f"_{thread_ts}"
-            
-        filepath = f"./data/conversations/{context_id}.json"
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        from state_store.async_writer import wait_for_pending
+
+        # Messages of the previous turn may still be queued for the background writer
+        wait_for_pending(user_id, channel_id, thread_ts)
+
+        redis = get_redis()
+        if redis is not None:
+            return [json.loads(item) for item in redis.lrange(_redis_key(user_id, channel_id, thread_ts), 0, -1)]
         
-        if os.path.exists(filepath):
-            with open(filepath, "r") as file:
-                return json.load(file)
-        else:
-            return []
+        with _history_lock:
+            return list(_load_file_history(_history_path(user_id, channel_id, thread_ts))[0])
     except Exception as e:
         logger.error(f"Error retrieving conversation history: {e}")
         return []
@@ -56,37 +124,65 @@ def add_to_conversation_history(user_id: str, message: str, is_user: bool,
         thread_ts: Optional thread timestamp for thread-specific history
     """
     try:
-        # Create a unique identifier for this conversation context
-        context_id = f"{user_id}"
-        if channel_id:
-            context_id += f"_{channel_id}"
-        if thread_ts:
-            context_id += f"_{thread_ts}"
-            
-        filepath = f"./data/conversations/{context_id}.json"
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        # Get existing history or create new
-        history = get_conversation_history(user_id, channel_id, thread_ts)
-        
-        # Add new message
-        history.append({
+        redis = get_redis()
+        if redis is not None:
+            _add_to_redis_history(redis, user_id, message, is_user, channel_id, thread_ts)
+        else:
+            _add_to_file_history(user_id, message, is_user, channel_id, thread_ts)
+
+        # Channel-level messages are also archived for relevance-based recall
+        if not thread_ts:
+            add_memory(user_id, message, is_user, channel_id)
+    except Exception as e:
+        logger.error(f"Error adding to conversation history: {e}")
+
+def _add_to_redis_history(redis, user_id: str, message: str, is_user: bool, channel_id: str, thread_ts: str) -> None:
+    # Append to a capped list in one round trip after taking the next sequence number, instead of
+    # reading and rewriting the whole history
+    key = _redis_key(user_id, channel_id, thread_ts)
+    seq = redis.incr(f"{key}:seq") - 1
+    entry = {
+        "user": "User" if is_user else "Assistant",
+        "text": message,
+        "timestamp": str(int(float(thread_ts) if thread_ts else 0)),
+        "seq": seq
+    }
+    with redis.pipeline() as pipe:
+        pipe.rpush(key, json.dumps(entry))
+        pipe.ltrim(key, -MAX_HISTORY_LENGTH, -1)
+        pipe.expire(key, REDIS_HISTORY_TTL)
+        pipe.expire(f"{key}:seq", REDIS_HISTORY_TTL)
+        pipe.execute()
+
+def _add_to_file_history(user_id: str, message: str, is_user: bool, channel_id: str, thread_ts: str) -> None:
+    filepath = _history_path(user_id, channel_id, thread_ts)
+    with _history_lock:
+        entry = _load_file_history(filepath)
+        messages = entry[0]
+
+        # Add new message, numbered so the rolling summary can tell which messages it already covers
+        messages.append({
             "user": "User" if is_user else "Assistant",
             "text": message,
-            "timestamp": str(int(float(thread_ts) if thread_ts else 0))
+            "timestamp": str(int(float(thread_ts) if thread_ts else 0)),
+            "seq": messages[-1].get("seq", len(messages) - 1) + 1 if messages else 0
         })
-        
-        # Limit history length
-        if len(history) > MAX_HISTORY_LENGTH:
-            history = history[-MAX_HISTORY_LENGTH:]
-        
-        # Save updated history
-        with open(filepath, "w") as file:
-            json.dump(history, file)
-    except Exception as e:
-        logger.error(f"Error adding to conversation history: {e}")
+
+        if entry[1] == 0 or entry[1] >= HISTORY_COMPACT_FACTOR * MAX_HISTORY_LENGTH:
+            # Start or compact the file with the latest messages only; the rename keeps readers from seeing it half-written
+            make_shard_dir(filepath)
+            tmp_path = f"{filepath}.tmp"
+            with open(tmp_path, "w") as file:
+                file.writelines(json.dumps(msg) + "\n" for msg in messages)
+            os.replace(tmp_path, filepath)
+            entry[1] = len(messages)
+            for legacy_path in _legacy_history_paths(filepath):
+                if os.path.exists(legacy_path):
+                    os.remove(legacy_path)
+        else:
+            with open(filepath, "a") as file:
+                file.write(json.dumps(messages[-1]) + "\n")
+            entry[1] += 1
 
 def clear_conversation_history(user_id: str, channel_id: str = None, thread_ts: str = None) -> None:
     """
@@ -98,51 +194,131 @@ def clear_conversation_history(user_id: str, channel_id: str = None, thread_ts:
         thread_ts: Optional thread timestamp for thread-specific history
     """
     try:
-        # Create a unique identifier for this conversation context
-        context_id = f"{user_id}"
-        if channel_id:
-            context_id += f"_{channel_id}"
-        if thread_ts:
-            context_id += f"_{thread_ts}"
-            
-        filepath = f"./data/conversations/{context_id}.json"
+        redis = get_redis()
+        if redis is not None:
+            key = _redis_key(user_id, channel_id, thread_ts)
+            redis.delete(key, f"{key}:seq")
+            return
         
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        filepath = _history_path(user_id, channel_id, thread_ts)
+        with _history_lock:
+            _history_cache.pop(filepath, None)
+            for path in (filepath, *_legacy_history_paths(filepath)):
+                if os.path.exists(path):
+                    os.remove(path)
     except Exception as e:
         logger.error(f"Error clearing conversation history: {e}")
 
-def summarize_conversation(user_id: str, channel_id: str = None, thread_ts: str = None) -> Optional[str]:
+def heuristic_summary(messages: List[Dict]) -> Optional[str]:
     """
-    Generate a summary of the conversation history using the selected AI provider
-    
+    Build a summary of older messages without calling the AI provider, for use while no rolling summary exists yet.
+    Keeps the lines that look like decisions, plans or open items, plus the last assistant reply.
+
+    Args:
+        messages: Conversation history entries to summarize
+
+    Returns:
+        The summary, or None if there was nothing worth keeping
+    """
+    key_lines = []
+    seen = set()
+    for msg in messages:
+        for line in msg["text"].splitlines():
+            line = line.strip()
+            if line and line not in seen and _KEY_LINE_PATTERN.search(line):
+                seen.add(line)
+                key_lines.append(f"- {msg['user']}: {line}")
+
+    last_reply = next((msg["text"].strip() for msg in reversed(messages) if msg["user"] == "Assistant"), "")
+
+    parts = []
+    if key_lines:
+        parts.append("Key points:\n" + "\n".join(key_lines))
+    if last_reply:
+        parts.append(f"Last assistant reply:\n{last_reply}")
+    if not parts:
+        return None
+    return "\n\n".join(parts)[:HEURISTIC_SUMMARY_MAX_CHARS]
+
+
+def _summary_path(user_id: str, channel_id: str = None, thread_ts: str = None) -> str:
+    return f"{SUMMARIES_DIR}/{context_id(user_id, channel_id, thread_ts)}.json"
+
+
+def _load_rolling_summary(filepath: str) -> Dict:
+    if os.path.exists(filepath):
+        with open(filepath, "r") as file:
+            return json.load(file)
+    return {"summary": "", "summarized_up_to": -1}
+
+
+def get_rolling_summary(user_id: str, channel_id: str = None, thread_ts: str = None) -> Optional[str]:
+    """
+    Get the stored rolling summary of the older part of a conversation
+
     Args:
         user_id: The Slack user ID
         channel_id: Optional channel ID for channel-specific history
         thread_ts: Optional thread timestamp for thread-specific history
-        
+
     Returns:
-        A summary of the conversation or None if error
+        The summary, or None if nothing has been summarized yet
+    """
+    try:
+        return _load_rolling_summary(_summary_path(user_id, channel_id, thread_ts))["summary"] or None
+    except Exception as e:
+        logger.error(f"Error retrieving rolling summary: {e}")
+        return None
+
+
+def update_rolling_summary(user_id: str, channel_id: str = None, thread_ts: str = None) -> None:
     """
+    Fold the messages that have aged out of the recent window into the rolling summary.
+    Only messages not yet covered by the summary are sent to the AI provider, so each update
+    costs O(new messages) rather than re-summarizing the whole conversation.
+
+    Args:
+        user_id: The Slack user ID
+        channel_id: Optional channel ID for channel-specific history
+        thread_ts: Optional thread timestamp for thread-specific history
+    """
+    filepath = _summary_path(user_id, channel_id, thread_ts)
+    with _summaries_lock:
+        if filepath in _summaries_updating:
+            return
+        _summaries_updating.add(filepath)
+
     try:
         from ai.providers import get_provider_response
-        
+
+        state = _load_rolling_summary(filepath)
         history = get_conversation_history(user_id, channel_id, thread_ts)
-        
-        if not history or len(history) < 3:
-            return None
-            
-        # Format conversation for summarization
-        conversation_text = "\n".join([f"{msg['user']}: {msg['text']}" for msg in history])
-        
-        # Create summarization prompt
-        prompt = f"Please summarize the following conversation concisely, focusing on the main points and any decisions made:\n\n{conversation_text}"
-        
-        # Use the user's selected AI provider to generate summary
+        new_messages = [
+            msg for msg in history[:-SUMMARY_KEEP_RECENT] if msg.get("seq", -1) > state["summarized_up_to"]
+        ]
+        if not new_messages:
+            return
+
+        conversation_text = "\n".join(f"{msg['user']}: {msg['text']}" for msg in new_messages)
+        if state["summary"]:
+            prompt = (
+                f"Here is a summary of a conversation so far:\n\n{state['summary']}\n\n"
+                f"Update it to also cover these newer messages, keeping it concise and focused on the main points "
+                f"and any decisions made:\n\n{conversation_text}"
+            )
+        else:
+            prompt = (
+                "Please summarize the following conversation concisely, focusing on the main points "
+                f"and any decisions made:\n\n{conversation_text}"
+            )
+
         system_content = "You are a helpful assistant that summarizes conversations accurately and concisely."
         summary = get_provider_response(user_id, prompt, [], system_content)
-        
-        return summary
+
+        with open(filepath, "w") as file:
+            json.dump({"summary": summary, "summarized_up_to": new_messages[-1]["seq"]}, file)
     except Exception as e:
-        logger.error(f"Error summarizing conversation: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"Error updating rolling summary: {e}")
+    finally:
+        with _summaries_lock:
+            _summaries_updating.discard(filepath)
@@ -0,0 +1,107 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+# Content-addressed cache of AI responses, so identical requests (same provider, model, system prompt,
+# prompt and context) are answered without another LLM call. Entries expire after `DEFAULT_TTL` seconds.
+
+CACHE_PATH = "./data/response_cache.sqlite3"
+DEFAULT_TTL = 3600
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+# sqlite3 connections can't be shared across threads, so each worker thread opens its own
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+        _local.conn = conn
+    return conn
+
+
+def make_key(*parts) -> str:
+    """
+    Build a cache key from the parts that determine a response
+
+    Args:
+        *parts: Values identifying the request, e.g. provider, model, system prompt, prompt and context
+
+    Returns:
+        A hex digest of the parts
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Reduce a prompt to its lowercase words, so requests that differ only in case, punctuation or
+    spacing (as transcripts of the same spoken question often do) share a cache key
+
+    Args:
+        prompt: The prompt text
+
+    Returns:
+        The normalized prompt
+    """
+    return " ".join(_PUNCTUATION.sub("", prompt.lower()).split())
+
+
+def get_cached(key: str) -> Optional[str]:
+    """
+    Get a cached response
+
+    Args:
+        key: The key from `make_key`
+
+    Returns:
+        The cached response, or None if missing or expired
+    """
+    try:
+        row = _connection().execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        logger.error(f"Error reading response cache: {e}")
+        return None
+
+
+def set_cached(key: str, value: str, ttl: int = DEFAULT_TTL) -> None:
+    """
+    Cache a response
+
+    Args:
+        key: The key from `make_key`
+        value: The response to cache
+        ttl: Seconds until the entry expires
+    """
+    try:
+        now = time.time()
+        conn = _connection()
+        with conn:
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)", (key, value, now + ttl)
+            )
+    except sqlite3.Error as e:
+        logger.error(f"Error writing response cache: {e}")
@@ -1,8 +1,16 @@
 import os
 import json
 import logging
+import sqlite3
+import threading
+import weakref
 from typing import Dict, Optional, Any
 
+from cachetools import TTLCache
+
+from ai.ai_constants import DEFAULT_SYSTEM_CONTENT
+from state_store._paths import PREFERENCES_DIR, STATE_DB_PATH, context_id
+
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
@@ -16,6 +24,57 @@ DEFAULT_PREFERENCES = {
     "summarize_long_conversations": True,  # Whether to summarize long conversations
 }
 
+# Preferences only change through `set_user_preferences`, so reads are served from memory.
+# Writes go through the cache: the saved preferences replace the cached entry and the derived
+# system prompt is dropped, so the next read after a save never touches disk. Since the cache can't
+# go stale within this process, the TTL only bounds how long edits made to the files by hand go unseen.
+PREFERENCES_CACHE_TTL = 300
+PREFERENCES_CACHE_SIZE = 10_000
+_preferences_cache = TTLCache(maxsize=PREFERENCES_CACHE_SIZE, ttl=PREFERENCES_CACHE_TTL)
+_system_prompt_cache = TTLCache(maxsize=PREFERENCES_CACHE_SIZE, ttl=PREFERENCES_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+# Saves read, merge and write a user's preferences, so saves for the same user run one at a time.
+# Locks are dropped once no save holds them
+_save_locks = weakref.WeakValueDictionary()
+_save_locks_lock = threading.Lock()
+
+# Default system prompt for each response length and conversation style, built once at import
+_LENGTH_SUFFIXES = {
+    "short": "\nKeep your responses very concise and to the point.\n",
+    "medium": "",
+    "long": "\nProvide detailed and comprehensive responses when appropriate.\n",
+}
+_STYLE_SUFFIXES = {
+    "precise": "\nBe precise, factual, and focus on accuracy.\n",
+    "balanced": "",
+    "creative": "\nBe creative, think outside the box, and offer innovative perspectives.\n",
+}
+_DEFAULT_PROMPTS = {
+    (length, style): DEFAULT_SYSTEM_CONTENT + length_suffix + style_suffix
+    for length, length_suffix in _LENGTH_SUFFIXES.items()
+    for style, style_suffix in _STYLE_SUFFIXES.items()
+}
+
+
+# Preferences are stored as one JSON row per user in a shared SQLite database. Users who saved
+# preferences before the move still have a file in PREFERENCES_DIR, which is read until they save again.
+
+# sqlite3 connections can't be shared across threads, so each worker thread opens its own
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(STATE_DB_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS preferences (user_id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        _local.conn = conn
+    return conn
+
+
 def get_user_preferences(user_id: str) -> Dict[str, Any]:
     """
     Get user preferences for AI interactions
@@ -26,27 +85,45 @@ def get_user_preferences(user_id: str) -> Dict[str, Any]:
     Returns:
         Dictionary of user preferences
     """
+    with _cache_lock:
+        cached = _preferences_cache.get(user_id)
+    if cached is not None:
+        # Hand out a copy so callers can't mutate the cached entry
+        return cached.copy()
+
+    preferences = _load_user_preferences(user_id)
+    with _cache_lock:
+        # A save may have written through while this read was loading; its entry is newer, so keep it
+        preferences = _preferences_cache.setdefault(user_id, preferences)
+    return preferences.copy()
+
+
+def _load_user_preferences(user_id: str) -> Dict[str, Any]:
     try:
-        filepath = f"./data/preferences/{user_id}.json"
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        if os.path.exists(filepath):
+        row = _connection().execute("SELECT data FROM preferences WHERE user_id = ?", (user_id,)).fetchone()
+        if row:
+            preferences = json.loads(row[0])
+        else:
+            filepath = f"{PREFERENCES_DIR}/{context_id(user_id)}.json"
+            if not os.path.exists(filepath):
+                # Return default preferences if no custom preferences exist
+                return DEFAULT_PREFERENCES.copy()
             with open(filepath, "r") as file:
                 preferences = json.load(file)
-                # Ensure all default preferences exist
-                for key, value in DEFAULT_PREFERENCES.items():
-                    if key not in preferences:
-                        preferences[key] = value
-                return preferences
-        else:
-            # Return default preferences if no custom preferences exist
-            return DEFAULT_PREFERENCES.copy()
+        
+        # Saved values over the defaults, so preferences added since the user last saved still exist
+        return {**DEFAULT_PREFERENCES, **preferences}
     except Exception as e:
         logger.error(f"Error retrieving user preferences: {e}")
         return DEFAULT_PREFERENCES.copy()
 
+def _save_lock(user_id: str) -> threading.Lock:
+    with _save_locks_lock:
+        lock = _save_locks.get(user_id)
+        if lock is None:
+            lock = _save_locks[user_id] = threading.Lock()
+        return lock
+
 def set_user_preferences(user_id: str, preferences: Dict[str, Any]) -> None:
     """
     Set user preferences for AI interactions
@@ -56,61 +133,64 @@ def set_user_preferences(user_id: str, preferences: Dict[str, Any]) -> None:
         preferences: Dictionary of user preferences to set
     """
     try:
-        filepath = f"./data/preferences/{user_id}.json"
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        # Get existing preferences
-        existing_preferences = get_user_preferences(user_id)
-        
-        # Update with new preferences
-        existing_preferences.update(preferences)
-        
-        # Save updated preferences
-        with open(filepath, "w") as file:
-            json.dump(existing_preferences, file)
+        with _save_lock(user_id):
+            # Get existing preferences
+            existing_preferences = get_user_preferences(user_id)
+
+            # Update with new preferences
+            existing_preferences.update(preferences)
+
+            # Save updated preferences
+            conn = _connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO preferences (user_id, data) VALUES (?, ?)",
+                    (user_id, json.dumps(existing_preferences)),
+                )
+
+            with _cache_lock:
+                _preferences_cache[user_id] = existing_preferences
+                _system_prompt_cache.pop(user_id, None)
     except Exception as e:
         logger.error(f"Error setting user preferences: {e}")
 
-def get_system_prompt(user_id: str) -> str:
+def get_system_prompt(user_id: str, preferences: Optional[Dict[str, Any]] = None) -> str:
     """
     Get the system prompt for a user, either custom or default
     
     Args:
         user_id: The Slack user ID
+        preferences: The user's preferences, if the caller has already loaded them
         
     Returns:
         System prompt string
     """
-    from ai.ai_constants import DEFAULT_SYSTEM_CONTENT
-    
-    try:
-        preferences = get_user_preferences(user_id)
-        custom_prompt = preferences.get("system_prompt", "")
-        
-        if custom_prompt and custom_prompt.strip():
-            return custom_prompt
-        else:
-            # Modify default system content based on user preferences
-            response_length = preferences.get("response_length", "medium")
-            conversation_style = preferences.get("conversation_style", "balanced")
-            
-            system_prompt = DEFAULT_SYSTEM_CONTENT
-            
-            # Adjust for response length
-            if response_length == "short":
-                system_prompt += "\nKeep your responses very concise and to the point.\n"
-            elif response_length == "long":
-                system_prompt += "\nProvide detailed and comprehensive responses when appropriate.\n"
-                
-            # Adjust for conversation style
-            if conversation_style == "precise":
-                system_prompt += "\nBe precise, factual, and focus on accuracy.\n"
-            elif conversation_style == "creative":
-                system_prompt += "\nBe creative, think outside the box, and offer innovative perspectives.\n"
-                
-            return system_prompt
-    except Exception as e:
-        logger.error(f"Error getting system prompt: {e}")
-        return DEFAULT_SYSTEM_CONTENT
\ No newline at end of file
+    if preferences is not None:
+        return _build_system_prompt(preferences)
+
+    with _cache_lock:
+        cached = _system_prompt_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    preferences = get_user_preferences(user_id)
+    system_prompt = _build_system_prompt(preferences)
+    with _cache_lock:
+        # Only cache the prompt if no save has changed the preferences it was built from
+        if _preferences_cache.get(user_id) == preferences:
+            _system_prompt_cache[user_id] = system_prompt
+    return system_prompt
+
+
+def _build_system_prompt(preferences: Dict[str, Any]) -> str:
+    custom_prompt = preferences.get("system_prompt", "")
+    if custom_prompt and custom_prompt.strip():
+        return custom_prompt
+
+    # Unknown values add nothing to the default prompt
+    response_length = preferences.get("response_length", "medium")
+    conversation_style = preferences.get("conversation_style", "balanced")
+    return _DEFAULT_PROMPTS.get(
+        (response_length, conversation_style),
+        DEFAULT_SYSTEM_CONTENT + _LENGTH_SUFFIXES.get(response_length, "") + _STYLE_SUFFIXES.get(conversation_style, ""),
+    )
@@ -0,0 +1,176 @@
+import os
+import json
+import math
+import re
+import logging
+import threading
+import weakref
+from collections import Counter, deque
+from typing import List, Dict
+
+from cachetools import LRUCache
+
+from state_store._paths import MEMORIES_DIR, context_id
+
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+# Long-term memory per user/channel. Every message is archived here as well as in the short
+# conversation history, and `recall_memories` returns only the messages relevant to a query
+# (bag-of-words cosine similarity) plus the latest few turns, so prompt size stays O(k).
+
+# Maximum number of messages kept per user/channel archive
+MAX_MEMORIES = 500
+
+# Archives are append-only JSONL, one message per line. The line count of recently used archives is kept
+# in memory, so appends don't re-read the file; once a file holds this many times MAX_MEMORIES lines it is
+# rewritten with just the latest ones
+MEMORY_COMPACT_FACTOR = 2
+_line_counts = LRUCache(maxsize=4096)
+_line_counts_lock = threading.Lock()
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# One lock per archive file, dropped once no thread holds it
+_archive_locks = weakref.WeakValueDictionary()
+_archive_locks_lock = threading.Lock()
+
+
+def _archive_lock(filepath: str) -> threading.Lock:
+    with _archive_locks_lock:
+        lock = _archive_locks.get(filepath)
+        if lock is None:
+            lock = _archive_locks[filepath] = threading.Lock()
+        return lock
+
+
+def _archive_path(user_id: str, channel_id: str = None) -> str:
+    return f"{MEMORIES_DIR}/{context_id(user_id, channel_id)}.jsonl"
+
+
+def _legacy_archive_path(filepath: str) -> str:
+    # Archives were first stored as a single JSON array
+    return filepath[:-len(".jsonl")] + ".json"
+
+
+def _load_archive(filepath: str) -> List[Dict]:
+    """
+    Read the latest MAX_MEMORIES messages of an archive. Must be called with the archive's lock held.
+    """
+    if os.path.exists(filepath):
+        with open(filepath, "r") as file:
+            lines = deque(file, maxlen=MAX_MEMORIES)
+        return [json.loads(line) for line in lines]
+    legacy_path = _legacy_archive_path(filepath)
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "r") as file:
+            return json.load(file)[-MAX_MEMORIES:]
+    return []
+
+
+def _line_count(filepath: str) -> int:
+    """
+    Get the number of lines in an archive, counting them on a miss. Must be called with the archive's lock held.
+    """
+    with _line_counts_lock:
+        count = _line_counts.get(filepath)
+    if count is None:
+        count = 0
+        if os.path.exists(filepath):
+            with open(filepath, "r") as file:
+                count = sum(1 for _ in file)
+    return count
+
+
+def _set_line_count(filepath: str, count: int) -> None:
+    with _line_counts_lock:
+        _line_counts[filepath] = count
+
+
+def _vectorize(text: str) -> Counter:
+    return Counter(_TOKEN_RE.findall(text.lower()))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[token] for token, count in a.items() if token in b)
+    if not dot:
+        return 0.0
+    norm_a = math.sqrt(sum(count * count for count in a.values()))
+    norm_b = math.sqrt(sum(count * count for count in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+def add_memory(user_id: str, message: str, is_user: bool, channel_id: str = None) -> None:
+    """
+    Archive a message for later recall
+
+    Args:
+        user_id: The Slack user ID
+        message: The message text
+        is_user: True if the message is from the user, False if from the bot
+        channel_id: Optional channel ID for channel-specific memory
+    """
+    try:
+        filepath = _archive_path(user_id, channel_id)
+        entry = {"user": "User" if is_user else "Assistant", "text": message}
+
+        with _archive_lock(filepath):
+            count = _line_count(filepath)
+            if count == 0 or count >= MEMORY_COMPACT_FACTOR * MAX_MEMORIES:
+                # Start or compact the file with the latest messages only; the rename keeps readers from
+                # seeing it half-written
+                archive = _load_archive(filepath)[-(MAX_MEMORIES - 1):] + [entry]
+                tmp_path = f"{filepath}.tmp"
+                with open(tmp_path, "w") as file:
+                    file.writelines(json.dumps(msg) + "\n" for msg in archive)
+                os.replace(tmp_path, filepath)
+                _set_line_count(filepath, len(archive))
+                legacy_path = _legacy_archive_path(filepath)
+                if os.path.exists(legacy_path):
+                    os.remove(legacy_path)
+            else:
+                with open(filepath, "a") as file:
+                    file.write(json.dumps(entry) + "\n")
+                _set_line_count(filepath, count + 1)
+    except Exception as e:
+        logger.error(f"Error adding memory: {e}")
+
+
+def recall_memories(user_id: str, channel_id: str = None, query: str = "", k: int = 5, recent: int = 2) -> List[Dict]:
+    """
+    Recall the archived messages most relevant to a query
+
+    Args:
+        user_id: The Slack user ID
+        channel_id: Optional channel ID for channel-specific memory
+        query: The text to match memories against, usually the new prompt
+        k: Maximum number of relevant messages to return
+        recent: Number of latest messages always included, so follow-up questions keep their context
+
+    Returns:
+        List of message dictionaries containing 'user' and 'text', oldest first
+    """
+    try:
+        from state_store.async_writer import wait_for_pending
+
+        # Channel-level messages reach the archive through the background writer
+        wait_for_pending(user_id, channel_id)
+
+        filepath = _archive_path(user_id, channel_id)
+        with _archive_lock(filepath):
+            archive = _load_archive(filepath)
+        if not archive:
+            return []
+
+        # The latest turns are always included; only older messages compete on relevance
+        split = max(len(archive) - recent, 0)
+        query_vector = _vectorize(query)
+        scored = [(_cosine(query_vector, _vectorize(msg["text"])), i) for i, msg in enumerate(archive[:split])]
+        relevant = sorted(i for score, i in sorted(scored, reverse=True)[:k] if score > 0)
+
+        return [archive[i] for i in relevant] + archive[split:]
+    except Exception as e:
+        logger.error(f"Error recalling memories: {e}")
+        return []